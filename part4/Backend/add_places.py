@@ -75,7 +75,7 @@ with app.app_context():
             print(f"Erreur lors de la création de la place: {e}")
     
     # Vérifier les places créées
-    places = facade.get_all_places()
+    places = facade.get_all_places(profile='card')
     print("\nPlaces dans la base de données après ajout:")
     for place in places:
         print(f"- {place.id}: {place.title}, prix={place.price}")
@@ -6,24 +6,40 @@ from app.api.v1.amenities import api as amenities_ns
 from app.api.v1.places import api as places_ns
 from app.api.v1.reviews import api as reviews_ns
 from app.api.v1.auth import api as auth_ns
+from app.api.compression import init_compression
+from app.api.representations import init_json, init_msgpack
 from app.extensions import bcrypt, jwt, db
-from app.database import init_db, seed_db
+from app.database import init_db, init_sqlite, seed_db
+from app.persistence.unit_of_work import init_unit_of_work
+from app.services import facade
 
 def create_app(config_class="config.DevelopmentConfig"):
     app = Flask(__name__)
     app.config.from_object(config_class)
     # Enable CORS for all routes
-    CORS(app, resources={r"/*": {"origins": "*"}})
+    CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"])
     api = Api(app, version='1.0', title='HBnB API', description='HBnB Application API')
+    init_json(api, app)
+    init_msgpack(api, app)
     bcrypt.init_app(app=app)
     jwt.init_app(app=app)
     db.init_app(app)
+    init_sqlite(app)
     with app.app_context():
         init_db()
         seed_db()
+        facade.load_indexes()
     api.add_namespace(users_ns, path='/api/v1/users')
     api.add_namespace(amenities_ns, path='/api/v1/amenities')
     api.add_namespace(places_ns, path='/api/v1/places')
     api.add_namespace(reviews_ns, path='/api/v1/reviews')
     api.add_namespace(auth_ns, path='/api/v1/auth')
+
+    @app.cli.command('rebuild-facets')
+    def rebuild_facets_command():
+        """Recompute the facet counters of the places listing."""
+        facade.rebuild_place_facets()
+
+    init_unit_of_work(app)
+    init_compression(app)
     return app
@@ -0,0 +1,152 @@
+"""
+Negotiated compression of the HTTP responses, as WSGI middleware.
+
+The encoding is picked from Accept-Encoding among brotli, when the brotli
+package is installed, and gzip. Responses whose Content-Length is known are
+compressed in one go when they reach COMPRESS_MIN_SIZE bytes; streamed ones
+are compressed chunk by chunk, at the cheaper COMPRESS_STREAM_LEVEL since they
+are whole listings, flushing after each chunk so that clients keep receiving
+them progressively. Compressed responses carry a weak ETag, as their
+bytes differ from the identity representation the strong ETag was computed on.
+"""
+import zlib
+from typing import Callable, Iterable, Iterator, Optional
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+from werkzeug.wsgi import ClosingIterator
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE = ('application/json', 'application/x-ndjson', 'application/msgpack', 'application/javascript', 'text/')
+# zlib window bits for a gzip header and trailer
+GZIP_WBITS = 31
+
+
+def gzip_compress(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _gzip_stream(chunks: Iterable[bytes], level: int) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _brotli_stream(chunks: Iterable[bytes], quality: int) -> Iterator[bytes]:
+    compressor = brotli.Compressor(quality=quality)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app: Callable, min_size: int = 1024, level: int = 6, stream_level: int = 1,
+                 brotli_quality: int = 4):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.stream_level = stream_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    def negotiate(self, environ) -> Optional[str]:
+        """Return the encoding the client prefers among the supported ones, if any."""
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        return accepted.best_match(self.encodings)
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip_compress(data, self.level)
+
+    def stream(self, chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+        if encoding == 'br':
+            return _brotli_stream(chunks, self.brotli_quality)
+        return _gzip_stream(chunks, self.stream_level)
+
+    @staticmethod
+    def _compressible(status: str, headers: Headers) -> bool:
+        code = int(status.split(None, 1)[0])
+        return (200 <= code < 300 and code not in (204, 206)
+                and 'Content-Encoding' not in headers
+                and 'no-transform' not in headers.get('Cache-Control', '')
+                and headers.get('Content-Type', '').startswith(COMPRESSIBLE))
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ)
+        if encoding is None:
+            def vary(status, headers, exc_info=None):
+                if self._compressible(status, Headers(headers)):
+                    headers.append(('Vary', 'Accept-Encoding'))
+                return start_response(status, headers, exc_info)
+            return self.app(environ, vary)
+
+        # Hold the headers back until the body tells whether to compress it
+        captured, written = [], []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return written.append
+
+        body = self.app(environ, capture)
+        status, headers, exc_info = captured
+        headers = Headers(headers)
+        # Anything sent through the legacy write() callable comes first
+        chunks = _chain(written, body) if written else body
+        close = getattr(body, 'close', None)
+        if not self._compressible(status, headers):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return ClosingIterator(chunks, close)
+        headers.add('Vary', 'Accept-Encoding')
+
+        length = headers.get('Content-Length', type=int)
+        if length is not None and length < self.min_size:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return ClosingIterator(chunks, close)
+
+        headers['Content-Encoding'] = encoding
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            headers['ETag'] = 'W/' + etag
+        if length is None:
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return ClosingIterator(self.stream(chunks, encoding), close)
+
+        try:
+            data = self.compress(b''.join(chunks), encoding)
+        finally:
+            if close is not None:
+                close()
+        headers['Content-Length'] = str(len(data))
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [data]
+
+
+def _chain(first: list, rest: Iterable[bytes]) -> Iterator[bytes]:
+    yield from first
+    yield from rest
+
+
+def init_compression(app):
+    """Wrap the WSGI application of `app` in the compression middleware, unless disabled."""
+    if app.config['COMPRESS_MIN_SIZE'] is None:
+        return
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=app.config['COMPRESS_MIN_SIZE'],
+        level=app.config['COMPRESS_LEVEL'],
+        stream_level=app.config['COMPRESS_STREAM_LEVEL'],
+        brotli_quality=app.config['COMPRESS_BROTLI_QUALITY'],
+    )
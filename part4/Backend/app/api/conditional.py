@@ -0,0 +1,86 @@
+"""
+Conditional GET: strong ETags and Last-Modified headers driven by updated_at.
+
+A GET method decorated with `conditional(probe)` first runs its probe, a cheap
+query returning the (max(updated_at), count) of the rows the response is built
+from. The ETag hashes that version with the request path, query string and
+response format, so a client whose copy is current gets a 304 before any row
+is hydrated or any JSON encoded.
+
+Only single documents, whose probe returns no count, are also validated by
+date: deleting a row of a collection leaves its max(updated_at) unchanged, so
+collections get no Last-Modified and ignore If-Modified-Since.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Optional, Tuple
+
+from flask import Response, after_this_request, request
+
+from app.api.representations import MSGPACK, NDJSON
+
+# (last modification, number of rows) of the data behind a response, with
+# no number of rows for a single document
+Version = Tuple[Optional[datetime], Optional[int]]
+
+
+def _http_date(moment: datetime) -> datetime:
+    """Naive local timestamps, as stored by BaseModel, to UTC whole seconds."""
+    return moment.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def make_etag(version: Version) -> str:
+    last_modified, count = version
+    accept = request.accept_mimetypes.best_match(['application/json', NDJSON, MSGPACK])
+    key = "|".join([request.path, request.query_string.decode('latin-1'), accept or '',
+                    last_modified.isoformat() if last_modified else '', str(count)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _set_validators(response: Response, etag: str, last_modified: Optional[datetime]) -> Response:
+    response.set_etag(etag)
+    if last_modified is not None:
+        # Werkzeug dates a Last-Modified of None with the current time
+        response.last_modified = last_modified
+    return response
+
+
+def _is_current(etag: str, last_modified: Optional[datetime]) -> bool:
+    if request.if_none_match:
+        # Weak comparison: the compression middleware weakens the ETags it sends
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(probe: Callable[..., Optional[Version]]):
+    """
+    Decorate a Resource GET method with conditional request handling.
+
+    `probe` is called with the view arguments; it returns the version of the
+    data, or None when the response cannot be validated (e.g. a 404 or a
+    document built from other tables), in which case the method runs as usual.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(resource, *args, **kwargs):
+            version = probe(*args, **kwargs)
+            if version is None:
+                return method(resource, *args, **kwargs)
+            etag = make_etag(version)
+            modified_at, count = version
+            last_modified = _http_date(modified_at) if modified_at and count is None else None
+            if _is_current(etag, last_modified):
+                return _set_validators(Response(status=304), etag, last_modified)
+
+            @after_this_request
+            def add_validators(response):
+                if response.status_code == 200:
+                    _set_validators(response, etag, last_modified)
+                return response
+
+            return method(resource, *args, **kwargs)
+        return wrapper
+    return decorator
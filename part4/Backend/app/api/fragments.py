@@ -0,0 +1,87 @@
+"""
+In-process LRU of the JSON encoding of each entity.
+
+List responses are stitched together from the encoded objects, so an entity
+that did not change since it was last listed is neither serialized nor encoded
+again. Entries are keyed by (model, id) and tagged with the updated_at of the
+row they were encoded from: a row read with another updated_at misses, and the
+mapper events below drop the entries of the rows updated or deleted through the
+ORM. Objects read without their id or updated_at, e.g. with ?fields=, are
+encoded every time.
+"""
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event
+
+from app.models.base import BaseModel
+
+# Every live cache, for the mapper events to invalidate
+_caches = weakref.WeakSet()
+
+
+class FragmentCache:
+    def __init__(self, dumps: Callable[[object], bytes], size: int):
+        self.dumps = dumps
+        self.size = size
+        self._lock = threading.Lock()
+        # (model, id) -> (updated_at, {(excluded_attr, only) as sets: encoded bytes})
+        self._entries = OrderedDict()
+        self.hits = self.misses = 0
+        _caches.add(self)
+
+    def encode(self, obj, excluded_attr: Iterable[str] = (), only: Optional[Iterable[str]] = None) -> bytes:
+        """Return the JSON encoding of obj.to_dict(excluded_attr, only=only), from the cache if current."""
+        values = obj.__dict__
+        obj_id, updated_at = values.get('id'), values.get('updated_at')
+        if not self.size or obj_id is None or updated_at is None:
+            return self.dumps(obj.to_dict(excluded_attr, only=only))
+        key = (getattr(obj, '_model', type(obj)), obj_id)
+        # The serializer outputs columns in their order: the same sets, in any
+        # order, give the same fragment
+        variant = (frozenset(excluded_attr), frozenset(only) if only is not None else None)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == updated_at and variant in entry[1]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1][variant]
+            self.misses += 1
+
+        fragment = self.dumps(obj.to_dict(excluded_attr, only=only))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != updated_at:
+                entry = self._entries[key] = (updated_at, {})
+            entry[1][variant] = fragment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return fragment
+
+    def encode_list(self, objects: Iterable, **kwargs) -> bytes:
+        """Return the JSON array of the encodings of `objects`."""
+        return b'[' + b','.join([self.encode(obj, **kwargs) for obj in objects]) + b']'
+
+    def discard(self, model: type, obj_id: str):
+        with self._lock:
+            self._entries.pop((model, obj_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+@event.listens_for(BaseModel, "after_update", propagate=True)
+@event.listens_for(BaseModel, "after_delete", propagate=True)
+def _discard_fragments(mapper, connection, target):
+    for cache in list(_caches):
+        cache.discard(mapper.class_, target.id)
@@ -0,0 +1,158 @@
+"""
+JSON and MessagePack encoding of the API responses.
+
+The JSON_BACKEND setting picks the encoder: 'orjson', C-accelerated, 'stdlib',
+or 'auto' (the default) which uses orjson when it is installed. Both write the
+same compact UTF-8 output for the types the API returns.
+
+List responses are stitched together from the cached encoding of each object,
+see app.api.fragments. Listings can also be streamed, as NDJSON or as a JSON
+array sent in chunks, from the same cache.
+
+When the msgpack package is installed, clients sending Accept:
+application/msgpack get the same documents as MessagePack, and request bodies
+sent as Content-Type: application/msgpack are read by api.payload as if they
+were JSON.
+"""
+import json
+from itertools import islice
+from typing import Callable, Dict, Iterable
+
+from flask import Request, Response, current_app, make_response, request, stream_with_context
+
+from app.api.fragments import FragmentCache
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+def _stdlib_dumps(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+BACKENDS: Dict[str, Callable[[object], bytes]] = {'stdlib': _stdlib_dumps}
+if orjson is not None:
+    BACKENDS['orjson'] = orjson.dumps
+
+
+def get_dumps(backend: str = 'auto') -> Callable[[object], bytes]:
+    """Return the function encoding a response body with `backend`."""
+    if backend == 'auto':
+        backend = 'orjson' if 'orjson' in BACKENDS else 'stdlib'
+    if backend not in BACKENDS:
+        raise ValueError(f"JSON backend {backend} is not available, use one of {', '.join(BACKENDS)}")
+    return BACKENDS[backend]
+
+
+def init_json(api, app):
+    """Register the configured JSON encoder as the application/json representation of `api`."""
+    dumps = app.extensions['json_dumps'] = get_dumps(app.config['JSON_BACKEND'])
+    app.extensions['json_fragments'] = FragmentCache(dumps, app.config['FRAGMENT_CACHE_SIZE'])
+
+    @api.representation('application/json')
+    def output_json(data, code, headers=None):
+        response = make_response(dumps(data), code)
+        response.mimetype = 'application/json'
+        response.headers.extend(headers or {})
+        return response
+
+
+MSGPACK = 'application/msgpack'
+
+
+def msgpack_dumps(data) -> bytes:
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def msgpack_loads(data: bytes):
+    return msgpack.unpackb(data, raw=False)
+
+
+class APIRequest(Request):
+    """Request reading MessagePack bodies through get_json, hence api.payload."""
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if self.mimetype != MSGPACK or msgpack is None:
+            return super().get_json(force=force, silent=silent, cache=cache)
+        if cache and 'msgpack' in self.__dict__:
+            return self.__dict__['msgpack']
+        try:
+            data = msgpack_loads(self.get_data(cache=cache))
+        except (ValueError, msgpack.UnpackException) as e:
+            if silent:
+                return None
+            return self.on_json_loading_failed(e)
+        if cache:
+            self.__dict__['msgpack'] = data
+        return data
+
+
+def init_msgpack(api, app):
+    """Register the MessagePack representation of `api`, if msgpack is installed."""
+    if msgpack is None:
+        return
+    app.request_class = APIRequest
+
+    @api.representation(MSGPACK)
+    def output_msgpack(data, code, headers=None):
+        response = make_response(msgpack_dumps(data), code)
+        response.mimetype = MSGPACK
+        response.headers.extend(headers or {})
+        return response
+
+
+NDJSON = 'application/x-ndjson'
+# Number of objects encoded into each chunk of a streamed response
+STREAM_CHUNK = 500
+
+
+def stream_response(objects: Iterable, ndjson: bool = False, **kwargs) -> Response:
+    """
+    Stream `objects`, serialized with to_dict(**kwargs), as NDJSON or as a JSON
+    array. Objects are encoded as they are pulled from the iterator, so the
+    response starts at once and memory does not grow with the collection.
+    """
+    fragments = current_app.extensions['json_fragments']
+    separator = b'\n' if ndjson else b','
+
+    def generate():
+        rows = iter(objects)
+        if not ndjson:
+            yield b'['
+        first = True
+        while True:
+            chunk = [fragments.encode(obj, **kwargs) for obj in islice(rows, STREAM_CHUNK)]
+            if not chunk:
+                break
+            body = separator.join(chunk)
+            if ndjson:
+                yield body + separator
+            else:
+                yield body if first else separator + body
+            first = False
+        if not ndjson:
+            yield b']'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON if ndjson else 'application/json')
+
+
+def list_response(objects: Iterable, headers=None, **kwargs):
+    """
+    Respond with the list of `objects` serialized with to_dict(**kwargs): as a
+    JSON array of cached fragments, or through the negotiated representation
+    when the client asked for another one.
+    """
+    mediatypes = ['application/json', MSGPACK] if msgpack is not None else ['application/json']
+    if request.accept_mimetypes.best_match(mediatypes, default='application/json') != 'application/json':
+        return [obj.to_dict(**kwargs) for obj in objects], 200, headers or {}
+    response = Response(current_app.extensions['json_fragments'].encode_list(objects, **kwargs),
+                        mimetype='application/json')
+    response.headers.extend(headers or {})
+    return response
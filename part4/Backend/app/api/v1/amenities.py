@@ -1,6 +1,10 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.services import facade
+from app.api.representations import list_response, stream_response
+from app.api.conditional import conditional
+from app.api.v1.utils import get_fields_arg, get_stream_format
+from app.models.amenity import Amenity
 
 api = Namespace('amenities', description='Amenity operations')
 
@@ -30,23 +34,45 @@ class AmenityList(Resource):
         except Exception as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params={
+        'stream': 'true to stream the whole collection as a chunked JSON array; send Accept: application/x-ndjson for NDJSON',
+        'fields': 'Comma-separated columns to return, e.g. id,name'
+    })
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(304, 'Not modified since the ETag or date of the request')
+    @api.response(400, 'Invalid query parameters')
+    @conditional(facade.get_amenities_version)
     def get(self):
         """Retrieve a list of all amenities"""
-        amenities = facade.get_all_amenities()
-        return [amenity.to_dict() for amenity in amenities], 200
+        try:
+            only = get_fields_arg(Amenity)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        stream = get_stream_format()
+        if stream:
+            return stream_response(facade.iter_amenities(fields=only), ndjson=stream == 'ndjson', only=only)
+        amenities = facade.get_all_amenities(fields=only)
+        return list_response(amenities, only=only)
 
 
 @api.route('/<amenity_id>')
 class AmenityResource(Resource):
+    @api.doc(params={'fields': 'Comma-separated columns to return, e.g. id,name'})
     @api.response(200, 'Amenity details retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(304, 'Not modified since the ETag or date of the request')
     @api.response(404, 'Amenity not found')
+    @conditional(facade.get_amenities_version)
     def get(self, amenity_id):
         """Get amenity details by ID"""
-        amenity = facade.get_amenity(amenity_id)
+        try:
+            only = get_fields_arg(Amenity)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        amenity = facade.get_amenity(amenity_id, fields=only)
         if not amenity:
             return {'error': 'Amenity not found'}, 404
-        return amenity.to_dict(), 200
+        return amenity.to_dict(only=only), 200
 
     @jwt_required()
     @api.expect(amenity_model)
@@ -1,6 +1,17 @@
+import json
+
+from flask import current_app, request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from app.services import facade
+from app.api.representations import NDJSON, list_response, stream_response
+from app.api.conditional import conditional
+from app.api.v1.utils import (batch, compound, get_fields_arg, get_ids_arg, get_include_arg, get_normalize_arg,
+                              get_page_args, get_float_arg, get_match_all_arg, get_stream_format, page_headers)
+from app.models.place import Place
+from app.models.review import Review
+from app.persistence.repository import BulkError
+from app.persistence.unit_of_work import unit_of_work
 
 api = Namespace('places', description='Place operations')
 
@@ -25,6 +36,49 @@ place_model = api.model('Place', {
     'amenities': fields.List(fields.String, required=True, description="List of amenities ID's")
 })
 
+# Relations a page of places can include: type of the related objects in
+# compound documents, and their serialization options
+LIST_INCLUDES = {
+    'owner': ('users', Place.serialized_relations['owner']),
+    'amenities': ('amenities', Place.serialized_relations['amenities']),
+}
+
+
+def _places_version(place_id=None):
+    """
+    Conditional GET probe: documents with related objects, and listings
+    filtered by amenities, depend on other tables than places.
+    """
+    if request.args.get('include') or request.args.get('amenities'):
+        return None
+    return facade.get_places_version(place_id)
+
+
+def _query_fields(only, include):
+    """Columns to read for the `only` fields of places with the relations `include`."""
+    if only is None or not include:
+        return only
+    return tuple(dict.fromkeys([*only, 'id', 'owner_id']))
+
+
+def _page_response(places, next_cursor, only, include, normalize):
+    if not include and not normalize:
+        return list_response(places, page_headers(next_cursor), only=only)
+    relations = facade.get_places_relations(places, include)
+    body = compound(places, relations, LIST_INCLUDES, normalize, only=only)
+    return body, 200, page_headers(next_cursor)
+
+
+def _batch_response(places, missing, only, include, normalize):
+    if not include and not normalize:
+        return batch(places, missing, only=only), 200
+    relations = facade.get_places_relations(places, include)
+    body = compound(places, relations, LIST_INCLUDES, normalize, only=only)
+    if normalize:
+        return {'items': body['data'], 'included': body['included'], 'missing': missing}, 200
+    return {'items': body, 'missing': missing}, 200
+
+
 @api.route('/')
 class PlaceList(Resource):
     @jwt_required()
@@ -43,22 +97,223 @@ class PlaceList(Resource):
         except Exception as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params={
+        'limit': 'Maximum number of places to return',
+        'cursor': 'Opaque cursor taken from the X-Next-Cursor header of the previous page',
+        'min_price': 'Minimum price per night',
+        'max_price': 'Maximum price per night',
+        'below_price': 'Price per night the places must be under, e.g. the max of a price facet',
+        'sort': 'Sort order: created_at (default), price or -price',
+        'amenities': 'Comma-separated amenity IDs the places must have',
+        'amenities_match': 'all (default): places with every amenity, any: places with at least one',
+        'ids': 'Comma-separated place IDs to fetch in one request, instead of a page; '
+               'include and normalize apply to them too',
+        'include': 'Comma-separated related objects to embed in each place of the page: owner, amenities',
+        'normalize': 'true to return {data, included}: places refer to their related objects by ID, '
+                     'and included holds each distinct one once',
+        'stream': 'true to stream every place, unfiltered, as a chunked JSON array; send Accept: application/x-ndjson for NDJSON',
+        'fields': 'Comma-separated columns to return, e.g. id,title,price'
+    })
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(304, 'Not modified since the ETag or date of the request')
+    @api.response(400, 'Invalid query parameters')
+    @conditional(_places_version)
     def get(self):
-        """Retrieve a list of all places"""
-        places = facade.get_all_places()
-        return [place.to_dict() for place in places], 200
+        """Retrieve a page of places, optionally filtered by price, or the places of a list of IDs"""
+        try:
+            only = get_fields_arg(Place)
+            stream = get_stream_format()
+            if stream:
+                return stream_response(facade.iter_places(only), ndjson=stream == 'ndjson', only=only)
+            include = get_include_arg(LIST_INCLUDES)
+            ids = get_ids_arg()
+            if ids is not None:
+                places, missing = facade.get_places_by_ids(ids, _query_fields(only, include))
+                return _batch_response(places, missing, only, include, get_normalize_arg())
+            limit, cursor = get_page_args()
+            places, next_cursor = facade.get_places_page(
+                limit, cursor,
+                min_price=get_float_arg('min_price'),
+                max_price=get_float_arg('max_price'),
+                below_price=get_float_arg('below_price'),
+                sort=request.args.get('sort', 'created_at'),
+                amenities=[a for a in request.args.get('amenities', '').split(',') if a],
+                match_all=get_match_all_arg(),
+                fields=_query_fields(only, include)
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return _page_response(places, next_cursor, only, include, get_normalize_arg())
+
+def _bulk_rows(lines, errors):
+    """
+    Parse the NDJSON request body: yield the place of each line, appending its
+    line number to `lines`, and the (line number, error) of the lines that are
+    not a place to `errors`.
+    """
+    max_rows = current_app.config['BULK_MAX_ROWS']
+    for number, line in enumerate(request.stream, 1):
+        if not line.strip():
+            continue
+        if len(lines) == max_rows:
+            errors.append((number, f'at most {max_rows} places can be created at once'))
+            return
+        try:
+            row = json.loads(line)
+        except ValueError:
+            errors.append((number, 'line is not valid JSON'))
+            continue
+        if not isinstance(row, dict) or not row.keys() <= place_model.keys():
+            errors.append((number, f"line must be an object with keys among {', '.join(place_model)}"))
+            continue
+        amenities = row.get('amenities', [])
+        if not isinstance(amenities, list) or not all(isinstance(amenity, str) for amenity in amenities):
+            errors.append((number, 'amenities must be a list of amenity IDs'))
+            continue
+        lines.append(number)
+        yield row
+
+
+@api.route('/bulk')
+class PlaceBulk(Resource):
+    @jwt_required()
+    @api.doc(description=f'Body: {NDJSON}, one place per line, with the fields of a single place')
+    @api.response(201, 'Places successfully created')
+    @api.response(400, 'Invalid input data: the invalid lines and why, no place is created')
+    @api.response(415, 'Body is not NDJSON')
+    def post(self):
+        """Register many places at once, all or none"""
+        if request.mimetype != NDJSON:
+            return {'error': f'Content-Type must be {NDJSON}'}, 415
+        lines, errors = [], []
+        try:
+            with unit_of_work():
+                created = facade.create_places(_bulk_rows(lines, errors), get_jwt_identity(),
+                                               current_app.config['BULK_BATCH_SIZE'])
+                if errors:
+                    raise BulkError([])
+        except BulkError as e:
+            errors += [(lines[position], message) for position, message in e.errors]
+        except KeyError as e:
+            return {'error': e.args[0]}, 400
+        if errors:
+            return {'error': 'Invalid input data',
+                    'errors': [{'line': line, 'error': message} for line, message in sorted(errors)]}, 400
+        return {'created': created}, 201
+
+@api.route('/facets')
+class PlaceFacets(Resource):
+    @api.response(200, 'Number of places per price range, amenity and rating band')
+    def get(self):
+        """Retrieve the counts behind the listing filters"""
+        return facade.get_place_facets(), 200
+
+@api.route('/search')
+class PlaceSearch(Resource):
+    @api.doc(params={
+        'q': 'Words to look for in the title and description of the places',
+        'limit': 'Maximum number of places to return',
+        'cursor': 'Opaque cursor taken from the X-Next-Cursor header of the previous page',
+        'fields': 'Comma-separated columns to return, e.g. id,title,price',
+        'include': 'Comma-separated related objects to embed in each place: owner, amenities',
+        'normalize': 'true to return {data, included}, with each distinct related object once'
+    })
+    @api.response(200, 'Matching places, most relevant first')
+    @api.response(304, 'Not modified since the ETag or date of the request')
+    @api.response(400, 'Invalid query parameters')
+    @conditional(_places_version)
+    def get(self):
+        """Full-text search over the title and description of the places"""
+        try:
+            limit, cursor = get_page_args()
+            only = get_fields_arg(Place)
+            include = get_include_arg(LIST_INCLUDES)
+            places, next_cursor = facade.search_places(request.args.get('q', ''), limit, cursor,
+                                                       fields=_query_fields(only, include))
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return _page_response(places, next_cursor, only, include, get_normalize_arg())
+
+@api.route('/suggest')
+class PlaceSuggest(Resource):
+    @api.doc(params={
+        'prefix': 'Beginning of the title, case and accent insensitive',
+        'limit': 'Maximum number of suggestions to return'
+    })
+    @api.response(200, 'Places whose title starts with the prefix')
+    @api.response(400, 'Invalid query parameters')
+    def get(self):
+        """Suggest place titles for type-ahead, without querying the database"""
+        prefix = request.args.get('prefix', '')
+        limit = request.args.get('limit', current_app.config['SUGGEST_SIZE'])
+        try:
+            limit = min(int(limit), current_app.config['MAX_PAGE_SIZE'])
+        except ValueError:
+            return {'error': 'limit must be an integer'}, 400
+        if not prefix.strip() or limit < 1:
+            return {'error': 'prefix and a positive limit are required'}, 400
+        return facade.suggest_places(prefix, limit), 200
+
+@api.route('/nearby')
+class PlaceNearby(Resource):
+    @api.doc(params={
+        'lat': 'Latitude of the search centre',
+        'lon': 'Longitude of the search centre',
+        'radius_km': 'Search radius in kilometres (default 10)',
+        'limit': 'Maximum number of places to return',
+        'fields': 'Comma-separated columns to return, e.g. id,title,price'
+    })
+    @api.response(200, 'Places within the radius, closest first')
+    @api.response(304, 'Not modified since the ETag or date of the request')
+    @api.response(400, 'Invalid query parameters')
+    @conditional(facade.get_places_version)
+    def get(self):
+        """Retrieve the places within a radius of a point"""
+        try:
+            limit, _ = get_page_args()
+            only = get_fields_arg(Place)
+            lat = get_float_arg('lat')
+            lon = get_float_arg('lon')
+            radius_km = get_float_arg('radius_km')
+            if lat is None or lon is None:
+                raise ValueError('lat and lon are required')
+            if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+                raise ValueError('lat must be between -90 and 90 and lon between -180 and 180')
+            if radius_km is None:
+                radius_km = 10.0
+            max_radius = current_app.config['MAX_NEARBY_RADIUS_KM']
+            if not 0 < radius_km <= max_radius:
+                raise ValueError(f'radius_km must be between 0 and {max_radius}')
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        places = facade.get_places_nearby(lat, lon, radius_km, limit, fields=only)
+        return [dict(place.to_dict(only=only), distance_km=round(distance, 3)) for place, distance in places], 200
 
 @api.route('/<place_id>')
 class PlaceResource(Resource):
+    @api.doc(params={
+        'include': 'Comma-separated related objects to embed: owner, reviews, amenities',
+        'fields': 'Comma-separated columns to return, e.g. id,title,price'
+    })
     @api.response(200, 'Place details retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(304, 'Not modified since the ETag or date of the request')
     @api.response(404, 'Place not found')
+    @conditional(_places_version)
     def get(self, place_id):
         """Get place details by ID"""
-        place = facade.get_place(place_id)
+        include = [name for name in request.args.get('include', '').split(',') if name]
+        try:
+            only = get_fields_arg(Place)
+            if not include:
+                place = facade.get_place(place_id, fields=only)
+            else:
+                place = facade.get_place_with(place_id, include, fields=only)
+        except ValueError as e:
+            return {'error': str(e)}, 400
         if not place:
             return {'error': 'Place not found'}, 404
-        return place.to_dict(), 200
+        return place.to_dict(include=include, only=only), 200
 
     @jwt_required()
     @api.expect(place_model)
@@ -103,18 +358,34 @@ class PlaceAmenities(Resource):
             if not a:
                 return {'error': 'Invalid input data'}, 400
         
-        for amenity in amenities_data:
-            place.add_amenity(amenity)
+        facade.add_place_amenities(place_id, [amenity['id'] for amenity in amenities_data])
         return {'message': 'Amenities added successfully'}, 200
 
 @api.route('/<place_id>/reviews/')
 class PlaceReviewList(Resource):
+    @api.doc(params={
+        'limit': 'Maximum number of reviews to return',
+        'cursor': 'Opaque cursor taken from the X-Next-Cursor header of the previous page',
+        'min_rating': 'Minimum rating of the reviews (1-5)',
+        'fields': 'Comma-separated columns to return, e.g. id,text,rating'
+    })
     @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(304, 'Not modified since the ETag or date of the request')
     @api.response(404, 'Place not found')
+    @conditional(facade.get_place_reviews_version)
     def get(self, place_id):
-        """Get all reviews for a specific place"""
+        """Get a page of reviews for a specific place, latest first"""
         place = facade.get_place(place_id)
         if not place:
             return {'error': 'Place not found'}, 404
-        return [review.to_dict() for review in place.reviews], 200
+        try:
+            limit, cursor = get_page_args()
+            only = get_fields_arg(Review)
+            reviews, next_cursor = facade.get_place_reviews_page(
+                place_id, limit, cursor, min_rating=get_float_arg('min_rating'), fields=only
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return list_response(reviews, page_headers(next_cursor), only=only)
     
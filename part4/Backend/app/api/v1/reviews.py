@@ -1,6 +1,10 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services import facade
+from app.api.representations import list_response, stream_response
+from app.api.conditional import conditional
+from app.api.v1.utils import batch, get_fields_arg, get_ids_arg, get_stream_format
+from app.models.review import Review
 
 api = Namespace('reviews', description='Review operations')
 
@@ -45,21 +49,47 @@ class ReviewList(Resource):
         except Exception as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params={
+        'ids': 'Comma-separated review IDs to fetch in one request',
+        'stream': 'true to stream the whole collection as a chunked JSON array; send Accept: application/x-ndjson for NDJSON',
+        'fields': 'Comma-separated columns to return, e.g. id,rating,text'
+    })
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(304, 'Not modified since the ETag or date of the request')
+    @api.response(400, 'Invalid query parameters')
+    @conditional(facade.get_reviews_version)
     def get(self):
         """Retrieve a list of all reviews"""
-        return [review.to_dict() for review in facade.get_all_reviews()], 200
+        try:
+            ids = get_ids_arg()
+            only = get_fields_arg(Review)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if ids is not None:
+            return batch(*facade.get_reviews_by_ids(ids, fields=only), only=only), 200
+        stream = get_stream_format()
+        if stream:
+            return stream_response(facade.iter_reviews(fields=only), ndjson=stream == 'ndjson', only=only)
+        return list_response(facade.get_all_reviews(fields=only), only=only)
 
 @api.route('/<review_id>')
 class ReviewResource(Resource):
+    @api.doc(params={'fields': 'Comma-separated columns to return, e.g. id,rating,text'})
     @api.response(200, 'Review details retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(304, 'Not modified since the ETag or date of the request')
     @api.response(404, 'Review not found')
+    @conditional(facade.get_reviews_version)
     def get(self, review_id):
         """Get review details by ID"""
-        review = facade.get_review(review_id)
+        try:
+            only = get_fields_arg(Review)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        review = facade.get_review(review_id, fields=only)
         if not review:
             return {'error': 'Review not found'}, 404
-        return review.to_dict(), 200
+        return review.to_dict(only=only), 200
 
     @api.expect(review_model)
     @api.response(200, 'Review updated successfully')
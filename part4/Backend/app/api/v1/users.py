@@ -1,6 +1,10 @@
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.services import facade
+from app.api.representations import list_response, stream_response
+from app.api.conditional import conditional
+from app.api.v1.utils import batch, get_fields_arg, get_ids_arg, get_stream_format
+from app.models.user import User
 
 api = Namespace('users', description='User operations')
 
@@ -36,22 +40,49 @@ class UserList(Resource):
         except Exception as e:
             return {'error': str(e)}, 400
         
+    @api.doc(params={
+        'ids': 'Comma-separated user IDs to fetch in one request',
+        'stream': 'true to stream the whole collection as a chunked JSON array; send Accept: application/x-ndjson for NDJSON',
+        'fields': 'Comma-separated columns to return, e.g. id,first_name,last_name'
+    })
     @api.response(200, 'List of users retrieved successfully')
+    @api.response(304, 'Not modified since the ETag or date of the request')
+    @api.response(400, 'Invalid query parameters')
+    @conditional(facade.get_users_version)
     def get(self):
         """Retrieve a list of users"""
-        users = facade.get_users()
-        return [user.to_dict(excluded_attr=[]) for user in users], 200
+        try:
+            ids = get_ids_arg()
+            only = get_fields_arg(User, hidden=["password"])
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if ids is not None:
+            return batch(*facade.get_users_by_ids(ids, fields=only), excluded_attr=["password"], only=only), 200
+        stream = get_stream_format()
+        if stream:
+            return stream_response(facade.iter_users(fields=only), ndjson=stream == 'ndjson',
+                                   excluded_attr=["password"], only=only)
+        users = facade.get_users(fields=only)
+        return list_response(users, excluded_attr=["password"], only=only)
     
 @api.route('/<user_id>')
 class UserResource(Resource):
+    @api.doc(params={'fields': 'Comma-separated columns to return, e.g. id,first_name,last_name'})
     @api.response(200, 'User details retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    @api.response(304, 'Not modified since the ETag or date of the request')
     @api.response(404, 'User not found')
+    @conditional(facade.get_users_version)
     def get(self, user_id):
         """Get user details by ID"""
-        user = facade.get_user(user_id)
+        try:
+            only = get_fields_arg(User, hidden=["password"])
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        user = facade.get_user(user_id, fields=only)
         if not user:
             return {'error': 'User not found'}, 404
-        return user.to_dict(), 200
+        return user.to_dict(excluded_attr=["password"], only=only), 200
 
     @jwt_required()
     @api.expect(user_model)
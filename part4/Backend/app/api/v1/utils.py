@@ -0,0 +1,134 @@
+from flask import current_app, request
+
+from app.api.representations import NDJSON
+from app.models.serializer import serializer_for
+
+
+def get_page_args():
+    """Read the `limit` and `cursor` query parameters of a paginated listing."""
+    limit = request.args.get('limit', current_app.config['PAGE_SIZE'])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, current_app.config['MAX_PAGE_SIZE']), request.args.get('cursor')
+
+
+def get_ids_arg():
+    """Read the comma-separated `ids` query parameter of a batch get, or None if absent."""
+    ids = request.args.get('ids')
+    if ids is None:
+        return None
+    ids = [obj_id for obj_id in ids.split(',') if obj_id]
+    if not ids:
+        raise ValueError('ids must contain at least one ID')
+    if len(ids) > current_app.config['MAX_PAGE_SIZE']:
+        raise ValueError(f"ids cannot contain more than {current_app.config['MAX_PAGE_SIZE']} IDs")
+    return ids
+
+
+def get_fields_arg(model, hidden=()):
+    """
+    Read the `fields` query parameter: the columns of `model` to return, once
+    each and in column order whatever the order of the request, or None for
+    all of them. Columns in `hidden` cannot be requested.
+    """
+    fields = request.args.get('fields')
+    if fields is None:
+        return None
+    fields = {field for field in fields.split(',') if field}
+    allowed = [column for column in serializer_for(model).columns if column not in hidden]
+    if not fields or not fields <= set(allowed):
+        raise ValueError(f"fields must be among {', '.join(allowed)}")
+    return tuple(column for column in allowed if column in fields)
+
+
+def batch(objects, missing, **kwargs):
+    """Body of a batch get: the objects found, in request order, and the IDs not found."""
+    return {'items': [obj.to_dict(**kwargs) for obj in objects], 'missing': missing}
+
+
+def get_include_arg(allowed):
+    """Read the comma-separated `include` query parameter: relations among `allowed` to embed."""
+    include = tuple(dict.fromkeys(name for name in request.args.get('include', '').split(',') if name))
+    if any(name not in allowed for name in include):
+        raise ValueError(f"include must be among {', '.join(allowed)}")
+    return include
+
+
+def get_normalize_arg():
+    """Read the `normalize` query parameter: True for compound documents with an `included` map."""
+    return request.args.get('normalize', '').lower() in ('1', 'true')
+
+
+def compound(objects, relations, types, normalize=False, **kwargs):
+    """
+    Body of a listing with related objects, serialized with to_dict(**kwargs).
+
+    `relations` maps each relation name to the id, or list of ids, every object
+    refers to and to the related objects by id. `types` maps it to the type of
+    the related objects and their to_dict options. Without `normalize`, each
+    document embeds its related documents. With it, documents carry the ids
+    and the body is {'data': [...], 'included': {type: {id: document}}}, where
+    each related object appears once.
+    """
+    related = {
+        name: {obj_id: obj.to_dict(**types[name][1]) for obj_id, obj in related_objects.items()}
+        for name, (_, related_objects) in relations.items()
+    }
+    documents = []
+    for obj in objects:
+        document = obj.to_dict(**kwargs)
+        for name, (references, _) in relations.items():
+            reference = references[obj.id]
+            if normalize:
+                document[name] = reference
+            elif isinstance(reference, list):
+                document[name] = [related[name][ref] for ref in reference if ref in related[name]]
+            else:
+                document[name] = related[name].get(reference)
+        documents.append(document)
+    if not normalize:
+        return documents
+    included = {}
+    for name, documents_by_id in related.items():
+        included.setdefault(types[name][0], {}).update(documents_by_id)
+    return {'data': documents, 'included': included}
+
+
+def page_headers(next_cursor):
+    """Headers advertising the cursor of the next page, if there is one."""
+    return {'X-Next-Cursor': next_cursor} if next_cursor else {}
+
+
+def get_float_arg(name):
+    """Read an optional float query parameter."""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+
+
+def get_match_all_arg():
+    """Read the `amenities_match` query parameter: True for all, False for any."""
+    match = request.args.get('amenities_match', 'all')
+    if match not in ('all', 'any'):
+        raise ValueError('amenities_match must be all or any')
+    return match == 'all'
+
+
+def get_stream_format():
+    """
+    Return 'ndjson' if the client accepts NDJSON, 'json' if it asked for a
+    streamed JSON array with ?stream=true, or None for a regular response.
+    """
+    if request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON:
+        return 'ndjson'
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return 'json'
+    return None
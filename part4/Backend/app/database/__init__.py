@@ -1,11 +1,88 @@
 from flask import current_app
+from sqlalchemy import event, inspect
 from app.extensions import db
+from app.geo import cell_of
 from app.models.user import User
 from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.facet import FacetCount
+from app.persistence.facets import rebuild_facets
+from app.persistence.fulltext import create_place_fts
+
+def init_sqlite(app):
+    """Run the SQLITE_PRAGMAS of `app` on every new connection of its database, if SQLite."""
+    pragmas = app.config['SQLITE_PRAGMAS']
+    with app.app_context():
+        engine = db.engine
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
 
 def init_db():
     """Initialize the database by creating tables."""
     db.create_all()
+    _add_missing_columns()
+    _add_missing_indexes()
+    _backfill_geo_cells()
+    if create_place_fts(db.session.connection()):
+        current_app.logger.info("Full-text index created: places_fts")
+    if not FacetCount.query.first():
+        rebuild_facets(db.session.connection())
+    db.session.commit()
+
+def _add_missing_columns():
+    """Add the columns declared on the models but missing from an existing database."""
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(db.text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            for index in table.indexes:
+                if column.name in index.columns:
+                    index.create(db.session.connection(), checkfirst=True)
+            current_app.logger.info(f"Column added: {table.name}.{column.name}")
+    db.session.commit()
+
+def _add_missing_indexes():
+    """Create the indexes declared on the models but missing from an existing database."""
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.session.connection())
+                current_app.logger.info(f"Index created: {index.name}")
+    db.session.commit()
+
+GEO_CELL_BATCH = 1000
+
+def _backfill_geo_cells():
+    """
+    Compute the grid cell of the places stored before it existed, in batches
+    of plain UPDATEs: neither updated_at nor the flush hooks see a change.
+    """
+    places = Place.__table__
+    pending = (db.select(places.c.id, places.c.latitude, places.c.longitude)
+               .where(places.c.geo_cell.is_(None)).order_by(places.c.id).limit(GEO_CELL_BATCH))
+    last_id = ''
+    while True:
+        rows = db.session.execute(pending.where(places.c.id > last_id)).all()
+        if not rows:
+            break
+        db.session.execute(db.text('UPDATE places SET geo_cell = :cell WHERE id = :id'),
+                           [{'id': place_id, 'cell': cell_of(latitude, longitude)}
+                            for place_id, latitude, longitude in rows])
+        last_id = rows[-1][0]
+    db.session.commit()
     
 def seed_db():
     """Seeds the database with initial data if it doesn't exist."""
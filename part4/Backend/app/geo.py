@@ -0,0 +1,66 @@
+"""Grid cells and distances used by the geospatial place search."""
+import math
+from typing import List, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEGREES = 0.1
+LAT_CELLS = int(round(180 / CELL_DEGREES))
+LON_CELLS = int(round(360 / CELL_DEGREES))
+
+
+def _lat_index(latitude: float) -> int:
+    return min(int((latitude + 90) / CELL_DEGREES), LAT_CELLS - 1)
+
+
+def _lon_index(longitude: float) -> int:
+    return min(int((longitude + 180) / CELL_DEGREES), LON_CELLS - 1)
+
+
+def cell_of(latitude: float, longitude: float) -> int:
+    """Return the grid cell containing a point.
+
+    Cells of the same latitude band are numbered contiguously from west to east,
+    so any longitude span inside a band is a single integer range.
+    """
+    return _lat_index(latitude) * LON_CELLS + _lon_index(longitude)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points, in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float):
+    """Return (min_lat, max_lat, [(min_lon, max_lon), ...]) enclosing a circle.
+
+    The longitude span is split in two when it crosses the antimeridian and
+    covers every longitude when the circle reaches a pole.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - dlat, latitude + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+
+    dlon = math.degrees(math.asin(math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))))
+    min_lon, max_lon = longitude - dlon, longitude + dlon
+    if max_lon - min_lon >= 360:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180.0), (-180.0, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def cell_ranges(min_lat: float, max_lat: float, lon_spans) -> List[Tuple[int, int]]:
+    """Return the inclusive cell id ranges covering a bounding box."""
+    ranges = []
+    for lat_index in range(_lat_index(min_lat), _lat_index(max_lat) + 1):
+        base = lat_index * LON_CELLS
+        for min_lon, max_lon in lon_spans:
+            ranges.append((base + _lon_index(min_lon), base + _lon_index(max_lon)))
+    return ranges
@@ -30,6 +30,11 @@ class Amenity(BaseModel):
 
 
 class PlaceAmenity(db.Model):
+    # The primary key serves amenities by place; this serves places by amenity
+    __table_args__ = (
+        db.Index('ix_place_amenity_amenity_id_place_id', 'amenity_id', 'place_id'),
+    )
+
     place_id = db.Column(db.String(36), db.ForeignKey("places.id"), primary_key=True)
     amenity_id = db.Column(db.String(36), db.ForeignKey("amenities.id"), primary_key=True)
 
@@ -1,7 +1,10 @@
 from app.extensions import db
 import uuid
 from datetime import datetime
-from typing import List
+from typing import Iterable, Optional
+
+from app.models.serializer import serializer_for
+from app.persistence.unit_of_work import commit
 
 
 class BaseModel(db.Model): 
@@ -9,7 +12,8 @@ class BaseModel(db.Model):
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     created_at = db.Column(db.DateTime, default=datetime.now)
-    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    # Indexed for the max(updated_at) probe of conditional GETs
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, index=True)
 
     def __init__(self):
         self.id = str(uuid.uuid4())
@@ -19,7 +23,7 @@ class BaseModel(db.Model):
     def save(self):
         """Update the updated_at timestamp whenever the object is modified"""
         self.updated_at = datetime.now()
-        db.session.commit()
+        commit()
 
     def update(self, data):
         """Update the attributes of the object based on the provided dictionary"""
@@ -28,16 +32,12 @@ class BaseModel(db.Model):
                 setattr(self, key, value)
         self.save() 
         
-    def to_dict(self, excluded_attr: List[str] = []):
-        """Convert the object attributes to a dictionary, excluding specified attributes."""
-        result = {}
-        for key, value in self.__dict__.items():
-            if key.startswith('_') or key in excluded_attr or isinstance(value, datetime):
-                continue
-            if isinstance(value, BaseModel):
-                result[key] = value.to_dict(excluded_attr)
-            else:
-                result[key] = value
-        return result
-        
-        
\ No newline at end of file
+    def to_dict(self, excluded_attr: Iterable[str] = (), include: Iterable[str] = (),
+                only: Optional[Iterable[str]] = None):
+        """
+        Convert the object columns to a dictionary, excluding specified attributes.
+
+        Datetimes are rendered as ISO strings. `include` names relations declared
+        in `serialized_relations` to embed, `only` restricts the columns.
+        """
+        return serializer_for(type(self))(self, excluded_attr, include, only)
@@ -0,0 +1,11 @@
+from app.extensions import db
+
+
+class FacetCount(db.Model):
+    """Number of places in one bucket of a listing filter, e.g. a price range."""
+
+    __tablename__ = 'facet_counts'
+
+    facet = db.Column(db.String(20), primary_key=True)
+    bucket = db.Column(db.String(36), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
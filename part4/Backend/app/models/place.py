@@ -1,7 +1,9 @@
 from typing import TYPE_CHECKING
 from app.models.base import BaseModel
+from sqlalchemy import event
 from sqlalchemy.orm import validates
 from app.extensions import db
+from app.geo import cell_of
 
 if TYPE_CHECKING == True:
     from app.models.user import User
@@ -12,12 +14,22 @@ if TYPE_CHECKING == True:
 class Place(BaseModel):
     
     __tablename__ = 'places'
+    __table_args__ = (
+        db.Index('ix_places_created_at_id', 'created_at', 'id'),
+        db.Index('ix_places_price_id', 'price', 'id'),
+        db.Index('ix_places_geo_cell', 'geo_cell'),
+        # The places of an owner, in listing order
+        db.Index('ix_places_owner_id_created_at_id', 'owner_id', 'created_at', 'id'),
+    )
 
     title = db.Column(db.String(50), nullable=False)
     description = db.Column(db.String(500), nullable=True)
     price = db.Column(db.Float, nullable=False)
     latitude = db.Column(db.Float, nullable=False)
     longitude = db.Column(db.Float, nullable=False)
+    # Grid cell of (latitude, longitude), kept up to date by _set_geo_cell.
+    # Prefixed with an underscore so that to_dict leaves it out.
+    _geo_cell = db.Column("geo_cell", db.Integer, nullable=True)
 
     owner_id = db.Column(db.String(36), db.ForeignKey("user.id"), nullable=False)
     owner = db.relationship("User", back_populates="places")
@@ -25,6 +37,19 @@ class Place(BaseModel):
     reviews = db.relationship("Review", back_populates="place", cascade="all, delete-orphan")
     amenities = db.relationship("Amenity", secondary="place_amenity", back_populates="places")
 
+    # Relations to_dict can embed, with the options of their own serializer
+    serialized_relations = {
+        'owner': {'only': ('id', 'first_name', 'last_name', 'email')},
+        'amenities': {'only': ('id', 'name')},
+        'reviews': {'include': ('user',)},
+    }
+    # Relationships each loading profile reads along with the places, see
+    # app.persistence.loading
+    loading_profiles = {
+        'card': ('owner', 'amenities'),
+        'detail': ('owner', 'amenities', 'reviews.user'),
+    }
+
 
     def __init__(
         self, title, price, latitude, longitude, owner, description=""
@@ -104,4 +129,10 @@ class Place(BaseModel):
         if longitude < -180 or longitude > 180:
             raise ValueError("longitude must be between -180 and 180")
 
-        return longitude
\ No newline at end of file
+        return longitude
+
+
+@event.listens_for(Place, "before_insert")
+@event.listens_for(Place, "before_update")
+def _set_geo_cell(mapper, connection, place):
+    place._geo_cell = cell_of(place.latitude, place.longitude)
@@ -11,6 +11,13 @@ if TYPE_CHECKING:
 class Review(BaseModel):
     
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('ix_reviews_place_id_created_at_id', 'place_id', 'created_at', 'id'),
+        # Covers the rating sums of the facets, read without the table
+        db.Index('ix_reviews_place_id_rating', 'place_id', 'rating'),
+        # The reviews of a user, latest first
+        db.Index('ix_reviews_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
 
     text = db.Column(db.String(500), nullable=False)
     rating = db.Column(db.Integer, nullable=False)
@@ -21,6 +28,17 @@ class Review(BaseModel):
     user = db.relationship("User", back_populates="reviews")
     place = db.relationship("Place", back_populates="reviews")
 
+    # Relations to_dict can embed, with the options of their own serializer
+    serialized_relations = {
+        'user': {'only': ('id', 'first_name', 'last_name')},
+    }
+    # Relationships each loading profile reads along with the reviews, see
+    # app.persistence.loading
+    loading_profiles = {
+        'card': ('user',),
+        'admin': ('user', 'place.owner'),
+    }
+
 
     def __init__(self, text, rating, place, user) -> None:
         super().__init__()
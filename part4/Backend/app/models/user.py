@@ -13,6 +13,12 @@ class User(BaseModel):
     places = db.relationship("Place", back_populates="owner", cascade="all, delete-orphan")
     reviews = db.relationship("Review", back_populates="user", cascade="all, delete-orphan")
 
+    # Relationships each loading profile reads along with the users, see
+    # app.persistence.loading
+    loading_profiles = {
+        'admin': ('places', 'reviews.place'),
+    }
+
     def __init__(
         self,
         first_name,
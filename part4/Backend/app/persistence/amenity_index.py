@@ -0,0 +1,166 @@
+import re
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from functools import reduce
+from itertools import chain
+from operator import and_, or_
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+
+from app.extensions import db
+from app.models.amenity import Amenity, PlaceAmenity
+from app.models.place import Place
+
+# Positions of the set bits of every byte value, and a scanner for non-zero bytes
+_BIT_POSITIONS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+_NON_ZERO = re.compile(b"[^\x00]")
+
+
+class AmenityIndex:
+    """
+    In-process bitmap index of the amenities of every place.
+
+    Each place gets a dense ordinal, in listing order (created_at, id), and each
+    amenity a bitset of the ordinals of its places, stored as a Python int.
+    "Places with all (or any) of these amenities" is then an AND (or OR) of a
+    few integers. The index is kept up to date from the session: changes are
+    collected when a flush touches places or amenities and applied on commit.
+    Commits do not come in creation order, so a new place is inserted at the
+    position of its sort key, shifting the ordinals of the places after it.
+    """
+
+    def __init__(self, session=None):
+        self._lock = threading.Lock()
+        self.clear()
+        if session is not None:
+            event.listen(session, "after_flush", self._collect)
+            event.listen(session, "after_commit", self._apply)
+            event.listen(session, "after_rollback", self._discard)
+
+    def clear(self):
+        self._ordinals: Dict[str, int] = {}
+        self._place_ids: List[Optional[str]] = []
+        self._keys: List[Tuple[datetime, str]] = []
+        self._bitmaps: Dict[str, int] = {}
+
+    def build(self):
+        """Rebuild the whole index from the database."""
+        keys = [tuple(key) for key in db.session.execute(
+            select(Place.created_at, Place.id).order_by(Place.created_at, Place.id)
+        )]
+        place_ids = [place_id for _, place_id in keys]
+        ordinals = {place_id: ordinal for ordinal, place_id in enumerate(place_ids)}
+
+        bits: Dict[str, bytearray] = {}
+        size = len(place_ids) // 8 + 1
+        for place_id, amenity_id in db.session.execute(select(PlaceAmenity.place_id, PlaceAmenity.amenity_id)):
+            ordinal = ordinals.get(place_id)
+            if ordinal is None:
+                continue
+            bitmap = bits.setdefault(amenity_id, bytearray(size))
+            bitmap[ordinal >> 3] |= 1 << (ordinal & 7)
+
+        with self._lock:
+            self._ordinals = ordinals
+            self._place_ids = place_ids
+            self._keys = keys
+            self._bitmaps = {amenity_id: int.from_bytes(bitmap, "little") for amenity_id, bitmap in bits.items()}
+
+    def set_place(self, place_id: str, amenity_ids: Iterable[str], created_at: Optional[datetime] = None):
+        """Record the amenities of a new or updated place created at `created_at`."""
+        with self._lock:
+            ordinal = self._ordinals.get(place_id)
+            if ordinal is None:
+                ordinal = self._insert(place_id, created_at or datetime.now())
+            bit = 1 << ordinal
+            amenity_ids = set(amenity_ids)
+            for amenity_id, bitmap in self._bitmaps.items():
+                if bitmap & bit and amenity_id not in amenity_ids:
+                    self._bitmaps[amenity_id] = bitmap & ~bit
+            for amenity_id in amenity_ids:
+                self._bitmaps[amenity_id] = self._bitmaps.get(amenity_id, 0) | bit
+
+    def _insert(self, place_id: str, created_at: datetime) -> int:
+        key = (created_at, place_id)
+        ordinal = bisect_right(self._keys, key)
+        if ordinal == len(self._keys):
+            self._place_ids.append(place_id)
+            self._keys.append(key)
+        else:
+            # New lists rather than in-place inserts: running matches keep
+            # the ordinals of the bitmaps they were computed from.
+            self._place_ids = self._place_ids[:ordinal] + [place_id] + self._place_ids[ordinal:]
+            self._keys = self._keys[:ordinal] + [key] + self._keys[ordinal:]
+            low = (1 << ordinal) - 1
+            for amenity_id, bitmap in self._bitmaps.items():
+                self._bitmaps[amenity_id] = bitmap & low | bitmap >> ordinal << ordinal + 1
+            for shifted, shifted_id in enumerate(self._place_ids[ordinal + 1:], ordinal + 1):
+                if shifted_id is not None:
+                    self._ordinals[shifted_id] = shifted
+        self._ordinals[place_id] = ordinal
+        return ordinal
+
+    def remove_place(self, place_id: str):
+        with self._lock:
+            ordinal = self._ordinals.pop(place_id, None)
+            if ordinal is None:
+                return
+            self._place_ids[ordinal] = None
+            mask = ~(1 << ordinal)
+            for amenity_id, bitmap in self._bitmaps.items():
+                self._bitmaps[amenity_id] = bitmap & mask
+
+    def remove_amenity(self, amenity_id: str):
+        with self._lock:
+            self._bitmaps.pop(amenity_id, None)
+
+    def match(self, amenity_ids: Iterable[str], match_all: bool = True,
+              after: Optional[Tuple[datetime, str]] = None) -> Iterator[str]:
+        """
+        Yield the ids of the places having all (or any) of `amenity_ids`, in
+        listing order, starting after the sort key (created_at, id) `after`.
+        """
+        with self._lock:
+            bitmaps = [self._bitmaps.get(amenity_id, 0) for amenity_id in amenity_ids]
+            place_ids, keys = self._place_ids, self._keys
+        if not bitmaps:
+            return
+        bits = reduce(and_ if match_all else or_, bitmaps)
+
+        start = bisect_right(keys, tuple(after)) if after else 0
+        bits >>= start
+        if not bits:
+            return
+        data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+        for match in _NON_ZERO.finditer(data):
+            offset = start + match.start() * 8
+            for bit in _BIT_POSITIONS[data[match.start()]]:
+                place_id = place_ids[offset + bit]
+                if place_id is not None:
+                    yield place_id
+
+    def _collect(self, session, flush_context):
+        changes = session.info.setdefault("amenity_index", {})
+        for obj in chain(session.new, session.dirty):
+            if isinstance(obj, Place) and (obj in session.new or inspect(obj).attrs.amenities.history.has_changes()):
+                changes[("place", obj.id)] = ([amenity.id for amenity in obj.amenities], obj.created_at)
+        for obj in session.deleted:
+            if isinstance(obj, Place):
+                changes[("place", obj.id)] = None
+            elif isinstance(obj, Amenity):
+                changes[("amenity", obj.id)] = None
+
+    def _apply(self, session):
+        for (kind, obj_id), change in session.info.pop("amenity_index", {}).items():
+            if kind == "amenity":
+                self.remove_amenity(obj_id)
+            elif change is None:
+                self.remove_place(obj_id)
+            else:
+                amenity_ids, created_at = change
+                self.set_place(obj_id, amenity_ids, created_at)
+
+    def _discard(self, session):
+        session.info.pop("amenity_index", None)
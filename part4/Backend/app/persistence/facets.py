@@ -0,0 +1,150 @@
+"""
+Facet counters of the places listing: price ranges, amenities and rating bands.
+
+Counts live in the facet_counts table and are updated in the same transaction
+as the writes that change them. Before a flush, the facets of every place it
+touches are read from the database; after the flush they are read again and
+the difference is added to the counters. rebuild_facets recomputes everything.
+"""
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.dialects.sqlite import insert
+
+from app.extensions import db
+from app.models.amenity import Amenity, PlaceAmenity
+from app.models.facet import FacetCount
+from app.models.place import Place
+from app.models.review import Review
+
+PRICE = 'price'
+AMENITY = 'amenity'
+RATING = 'rating'
+
+# Lower bounds of the price ranges, each range [min, max) being listed by
+# min_price=min&below_price=max; the last range is open-ended
+PRICE_BUCKETS = (0, 25, 50, 100, 150, 200, 300, 500)
+RATING_BANDS = ('unrated', '1', '2', '3', '4', '5')
+
+_CHUNK = 500
+
+
+def price_bucket(price: float) -> str:
+    bucket = PRICE_BUCKETS[0]
+    for low in PRICE_BUCKETS:
+        if price >= low:
+            bucket = low
+    return str(bucket)
+
+
+def rating_band(rating_sum: int, rating_count: int) -> str:
+    return str(int(rating_sum / rating_count)) if rating_count else 'unrated'
+
+
+def _place_facets(connection, place_ids: Iterable[str]) -> Dict[str, List[Tuple[str, str]]]:
+    """Return the (facet, bucket) pairs each existing place is counted in."""
+    place_ids = list(place_ids)
+    prices, amenities, ratings = {}, {}, {}
+    for start in range(0, len(place_ids), _CHUNK):
+        chunk = place_ids[start:start + _CHUNK]
+        prices.update(connection.execute(select(Place.id, Place.price).where(Place.id.in_(chunk))).all())
+        for place_id, amenity_id in connection.execute(
+                select(PlaceAmenity.place_id, PlaceAmenity.amenity_id).where(PlaceAmenity.place_id.in_(chunk))):
+            amenities.setdefault(place_id, []).append(amenity_id)
+        for place_id, rating_sum, rating_count in connection.execute(
+                select(Review.place_id, func.sum(Review.rating), func.count())
+                .where(Review.place_id.in_(chunk)).group_by(Review.place_id)):
+            ratings[place_id] = (rating_sum, rating_count)
+
+    return {
+        place_id: [(PRICE, price_bucket(price)), (RATING, rating_band(*ratings.get(place_id, (0, 0))))]
+                  + [(AMENITY, amenity_id) for amenity_id in amenities.get(place_id, [])]
+        for place_id, price in prices.items()
+    }
+
+
+def _add_counts(connection, counts: Counter):
+    rows = [{'facet': facet, 'bucket': bucket, 'count': count}
+            for (facet, bucket), count in counts.items() if count]
+    if not rows:
+        return
+    statement = insert(FacetCount.__table__)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=['facet', 'bucket'],
+        set_={'count': FacetCount.__table__.c.count + statement.excluded.count}
+    ), rows)
+
+
+def _touched_places(session) -> set:
+    place_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Place):
+            place_ids.add(obj.id)
+        elif isinstance(obj, Review):
+            place_ids.add(obj.place.id if obj.place is not None else obj.place_id)
+        elif isinstance(obj, Amenity) and obj in session.deleted:
+            place_ids.update(place.id for place in obj.places)
+    place_ids.discard(None)
+    return place_ids
+
+
+@event.listens_for(db.session, "before_flush")
+def _read_facets_before(session, flush_context, instances):
+    place_ids = _touched_places(session)
+    session.info['facets_before'] = (place_ids, _place_facets(session.connection(), place_ids)) if place_ids else None
+
+
+@event.listens_for(db.session, "after_flush")
+def _count_facet_changes(session, flush_context):
+    pending = session.info.pop('facets_before', None)
+    if not pending:
+        return
+    place_ids, before = pending
+    connection = session.connection()
+    counts = Counter(chain.from_iterable(_place_facets(connection, place_ids).values()))
+    counts.subtract(chain.from_iterable(before.values()))
+    _add_counts(connection, counts)
+
+    deleted_amenities = [obj.id for obj in session.deleted if isinstance(obj, Amenity)]
+    if deleted_amenities:
+        connection.execute(delete(FacetCount).where(
+            FacetCount.facet == AMENITY, FacetCount.bucket.in_(deleted_amenities)
+        ))
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_facets(session):
+    session.info.pop('facets_before', None)
+
+
+def rebuild_facets(connection):
+    """Recompute every counter from the places, amenities and reviews tables."""
+    counts = Counter()
+    for (price,) in connection.execute(select(Place.price)):
+        counts[(PRICE, price_bucket(price))] += 1
+    for amenity_id, count in connection.execute(
+            select(PlaceAmenity.amenity_id, func.count()).group_by(PlaceAmenity.amenity_id)):
+        counts[(AMENITY, amenity_id)] = count
+    ratings = (select(Place.id, func.coalesce(func.sum(Review.rating), 0), func.count(Review.id))
+               .outerjoin(Review, Review.place_id == Place.id).group_by(Place.id))
+    for _, rating_sum, rating_count in connection.execute(ratings):
+        counts[(RATING, rating_band(rating_sum, rating_count))] += 1
+    connection.execute(delete(FacetCount))
+    _add_counts(connection, counts)
+
+
+def read_facets(connection) -> dict:
+    """Return the facets of the listing filters, as served by GET /places/facets."""
+    counts = {(facet, bucket): count for facet, bucket, count in connection.execute(
+        select(FacetCount.facet, FacetCount.bucket, FacetCount.count))}
+    bounds = PRICE_BUCKETS + (None,)
+    amenities = connection.execute(select(Amenity.id, Amenity.name).order_by(Amenity.name)).all()
+    return {
+        'price': [{'min': low, 'max': high, 'count': counts.get((PRICE, str(low)), 0)}
+                  for low, high in zip(bounds, bounds[1:])],
+        'amenities': [{'id': amenity_id, 'name': name, 'count': counts.get((AMENITY, amenity_id), 0)}
+                      for amenity_id, name in amenities],
+        'rating': {band: counts.get((RATING, band), 0) for band in RATING_BANDS},
+    }
@@ -0,0 +1,107 @@
+"""
+SQLite FTS5 index over the title and description of the places.
+
+places_fts is a shadow table whose rowids are those of places_fts_ids, an
+explicit INTEGER PRIMARY KEY next to the id of the indexed place. The implicit
+rowid of places, whose primary key is a string, would not do: VACUUM may
+renumber it. Both are created by init_db, replacing an index keyed on the
+rowid of places, and kept in sync by the mapper events below, inside the same
+transaction as the write to the places table.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event, inspect, text
+
+from app.models.place import Place
+
+# Weights of the title and description columns in the bm25 ranking
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_SCORE = f"bm25(places_fts, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def create_place_fts(connection) -> bool:
+    """Create places_fts and index the existing places. Return False if it already existed."""
+    if connection.dialect.name != "sqlite" or inspect(connection).has_table("places_fts_ids"):
+        return False
+    connection.execute(text("DROP TABLE IF EXISTS places_fts"))
+    connection.execute(text(
+        "CREATE TABLE places_fts_ids (rowid INTEGER PRIMARY KEY, place_id VARCHAR(36) NOT NULL UNIQUE)"
+    ))
+    connection.execute(text(
+        "CREATE VIRTUAL TABLE places_fts USING fts5(title, description, tokenize='unicode61 remove_diacritics 2')"
+    ))
+    rebuild_place_fts(connection)
+    return True
+
+
+def _insert_documents(connection, where: str = "", params: Optional[dict] = None):
+    connection.execute(text(f"INSERT INTO places_fts_ids (place_id) SELECT id FROM places {where}"), params)
+    connection.execute(text(
+        "INSERT INTO places_fts (rowid, title, description) "
+        "SELECT ids.rowid, places.title, coalesce(places.description, '') "
+        f"FROM places JOIN places_fts_ids AS ids ON ids.place_id = places.id {where}"
+    ), params)
+
+
+def rebuild_place_fts(connection):
+    """Re-index every place from scratch."""
+    connection.execute(text("DELETE FROM places_fts"))
+    connection.execute(text("DELETE FROM places_fts_ids"))
+    _insert_documents(connection)
+
+
+def match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query matching every word, the last one as a prefix."""
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        raise ValueError("q must contain at least one word")
+    return " ".join(f'"{token}"' for token in tokens) + "*"
+
+
+def search_places(connection, query: str, limit: int,
+                  after: Optional[Tuple[float, int]] = None) -> List[Tuple[float, int, str]]:
+    """
+    Return (score, rowid, place id) of the best matches of `query`, best first,
+    after the (score, rowid) key `after`.
+    """
+    sql = (f"SELECT {_SCORE} AS score, places_fts.rowid, ids.place_id FROM places_fts "
+           "JOIN places_fts_ids AS ids ON ids.rowid = places_fts.rowid WHERE places_fts MATCH :match")
+    params = {"match": match_expression(query), "limit": limit}
+    if after is not None:
+        sql += f" AND ({_SCORE}, places_fts.rowid) > (:score, :rowid)"
+        params.update(score=after[0], rowid=after[1])
+    sql += " ORDER BY score, places_fts.rowid LIMIT :limit"
+    return [tuple(row) for row in connection.execute(text(sql), params)]
+
+
+def _enabled(connection) -> bool:
+    return connection.dialect.name == "sqlite"
+
+
+@event.listens_for(Place, "after_insert")
+def _index_place(mapper, connection, place):
+    if _enabled(connection):
+        _insert_documents(connection, "WHERE places.id = :id", {"id": place.id})
+
+
+@event.listens_for(Place, "after_update")
+def _reindex_place(mapper, connection, place):
+    state = inspect(place)
+    if not _enabled(connection) or not (state.attrs.title.history.has_changes()
+                                        or state.attrs.description.history.has_changes()):
+        return
+    _unindex_place(mapper, connection, place)
+    _index_place(mapper, connection, place)
+
+
+@event.listens_for(Place, "before_delete")
+def _unindex_place(mapper, connection, place):
+    if _enabled(connection):
+        connection.execute(text(
+            "DELETE FROM places_fts WHERE rowid = (SELECT rowid FROM places_fts_ids WHERE place_id = :id)"
+        ), {"id": place.id})
+        connection.execute(text("DELETE FROM places_fts_ids WHERE place_id = :id"), {"id": place.id})
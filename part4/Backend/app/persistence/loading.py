@@ -0,0 +1,58 @@
+"""
+Eager-loading profiles: named sets of relationships read along with objects.
+
+Models declare them next to their relationships, in `loading_profiles`, as
+dotted paths: Place's 'detail' profile loads 'reviews.user', the reviews of
+each place and the author of each review. A many-to-one step is joined to the
+row of its parent, a collection is read with one SELECT ... IN per step, so a
+read costs a fixed number of queries whatever the number of objects, and
+serializing the relationships afterwards issues none.
+"""
+from functools import lru_cache
+from typing import Iterable, Sequence, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+
+@lru_cache(maxsize=256)
+def _options(model: type, paths: Tuple[str, ...]) -> tuple:
+    options = []
+    for path in paths:
+        option, current = None, model
+        for key in path.split('.'):
+            relationships = inspect(current).relationships
+            if key not in relationships:
+                raise ValueError(f"{current.__name__} has no relationship {key}")
+            loader = selectinload if relationships[key].uselist else joinedload
+            attr = getattr(current, key)
+            option = loader(attr) if option is None else getattr(option, loader.__name__)(attr)
+            current = relationships[key].mapper.class_
+        options.append(option)
+    return tuple(options)
+
+
+def loader_options(model: type, paths: Iterable[str]) -> tuple:
+    """Loader options eagerly loading the relationship `paths` of `model`."""
+    return _options(model, tuple(paths))
+
+
+def profile_options(model: type, profile: str) -> tuple:
+    """Loader options of the loading profile `profile` of `model`."""
+    profiles = getattr(model, 'loading_profiles', {})
+    if profile not in profiles:
+        raise ValueError(f"profile must be among {', '.join(profiles)}")
+    return loader_options(model, profiles[profile])
+
+
+def include_paths(model: type, include: Sequence[str]) -> Tuple[str, ...]:
+    """
+    Relationship paths to load for to_dict(include=include): each relation
+    and the relations its own serializer includes.
+    """
+    relations = getattr(model, 'serialized_relations', {})
+    unknown = set(include) - relations.keys()
+    if unknown:
+        raise ValueError(f"include must be among {', '.join(relations)}")
+    return tuple(f"{name}.{nested}" if nested else name
+                 for name in include for nested in relations[name].get('include') or (None,))
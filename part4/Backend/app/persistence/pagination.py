@@ -0,0 +1,68 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_value(column, value: Any) -> Any:
+    """The value of `column` encoded as `value`, checked against the column type."""
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if type(value) is not python_type:
+        raise ValueError
+    return value
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """Decode a cursor produced by encode_cursor for the given sort columns."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_decode_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_filter(query, columns: Sequence, cursor: Optional[str] = None, descending: bool = False):
+    """Order `query` by `columns` and keep only the rows after `cursor`."""
+    key = tuple_(*columns)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < after if descending else key > after)
+    return query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+
+
+def page_of(rows: list, columns: Sequence, limit: int) -> Tuple[list, Optional[str]]:
+    """Cut `limit` rows out of at most `limit + 1` and build the next page cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
+
+
+def keyset_page(query, columns: Sequence, limit: int, cursor: Optional[str] = None,
+                descending: bool = False) -> Tuple[list, Optional[str]]:
+    """
+    Return one page of `query` ordered by `columns` and the cursor of the next page.
+
+    The last column must be unique (the primary key) so that the ordering is total.
+    Rows are fetched with a range predicate on the sort key instead of an OFFSET,
+    so every page costs the same whatever its position in the table.
+    """
+    rows = keyset_filter(query, columns, cursor, descending).limit(limit + 1).all()
+    return page_of(rows, columns, limit)
@@ -1,7 +1,132 @@
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, Integer, and_, column, exists, or_, select
+
+from app.extensions import db
+from app.geo import bounding_box, cell_ranges, haversine_km
+from app.persistence.amenity_index import AmenityIndex
+from app.persistence.facets import read_facets, rebuild_facets
+from app.persistence.fulltext import search_places
 from app.persistence.repository import SQLAlchemyRepository
+from app.persistence.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_page, page_of
+from app.models.amenity import PlaceAmenity
 from app.models.place import Place
 
 class PlaceRepository(SQLAlchemyRepository[Place]):
+    SORTS = {
+        'created_at': ((Place.created_at, Place.id), False),
+        'price': ((Place.price, Place.id), False),
+        '-price': ((Place.price, Place.id), True),
+    }
+
+    # Number of candidate ids taken from the amenity index per query
+    AMENITY_BATCH = 500
+    # Sort key of the full-text search results
+    TEXT_SEARCH_KEY = (column('score', Float), column('rowid', Integer))
+
     def __init__(self):
         super().__init__(Place)
-    
+        self.amenity_index = AmenityIndex(db.session)
+
+    def search(self, limit: int, cursor: Optional[str] = None, min_price: Optional[float] = None,
+               max_price: Optional[float] = None, sort: str = 'created_at',
+               below_price: Optional[float] = None,
+               amenities: Optional[Sequence[str]] = None,
+               match_all: bool = True,
+               fields: Optional[Sequence[str]] = None) -> Tuple[List[Place], Optional[str]]:
+        """
+        Return a page of places within a price range, ordered by `sort`: from
+        `min_price` up to `max_price` included or `below_price` excluded, the
+        bounds of the price facets.
+
+        When `amenities` is given, only the places having all (or any, if
+        `match_all` is false) of them are returned: in listing order, as found
+        by the amenity index; in price order, tested against place_amenity.
+        """
+        if sort not in self.SORTS:
+            raise ValueError(f"sort must be one of: {', '.join(self.SORTS)}")
+        columns, descending = self.SORTS[sort]
+        query = self.query(fields, *columns)
+        if min_price is not None:
+            query = query.filter(Place.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Place.price <= max_price)
+        if below_price is not None:
+            query = query.filter(Place.price < below_price)
+        if not amenities:
+            return keyset_page(query, columns, limit, cursor, descending=descending)
+
+        if sort != 'created_at':
+            # The index is not in price order: let SQLite walk the price order
+            # and probe ix_place_amenity_amenity_id_place_id for each place.
+            query = query.filter(self._has_amenities(amenities, match_all))
+            return keyset_page(query, columns, limit, cursor, descending=descending)
+
+        # The index yields matches in listing order: walk it from the cursor
+        # and fetch candidates in batches until the page is full.
+        after = decode_cursor(cursor, columns) if cursor else None
+        candidates = self.amenity_index.match(amenities, match_all, after=after)
+        query = keyset_filter(query, columns, cursor)
+        rows = []
+        while len(rows) <= limit:
+            batch = list(islice(candidates, self.AMENITY_BATCH))
+            if not batch:
+                break
+            rows += query.filter(Place.id.in_(batch)).limit(limit + 1 - len(rows)).all()
+        return page_of(rows, columns, limit)
+
+    @staticmethod
+    def _has_amenities(amenity_ids: Sequence[str], match_all: bool):
+        """Condition on a place having all (or any) of `amenity_ids`."""
+        def has(*ids):
+            return exists().where(PlaceAmenity.amenity_id.in_(ids), PlaceAmenity.place_id == Place.id)
+        amenity_ids = list(dict.fromkeys(amenity_ids))
+        return and_(*[has(amenity_id) for amenity_id in amenity_ids]) if match_all else has(*amenity_ids)
+
+    def get_amenity_ids(self, place_ids: Iterable[str]) -> Dict[str, List[str]]:
+        """Return the amenity ids of each of the places `place_ids`, with one query."""
+        amenity_ids = {place_id: [] for place_id in place_ids}
+        query = select(PlaceAmenity.place_id, PlaceAmenity.amenity_id).where(PlaceAmenity.place_id.in_(amenity_ids))
+        for place_id, amenity_id in db.session.execute(query):
+            amenity_ids[place_id].append(amenity_id)
+        return amenity_ids
+
+    def get_facets(self) -> dict:
+        return read_facets(db.session.connection())
+
+    def rebuild_facets(self):
+        rebuild_facets(db.session.connection())
+        db.session.commit()
+
+    def nearby(self, latitude: float, longitude: float, radius_km: float,
+               limit: int, fields: Optional[Sequence[str]] = None) -> List[Tuple[Place, float]]:
+        """Return the `limit` closest places within `radius_km` with their distance."""
+        min_lat, max_lat, lon_spans = bounding_box(latitude, longitude, radius_km)
+        cells = or_(*[Place._geo_cell.between(low, high) for low, high in cell_ranges(min_lat, max_lat, lon_spans)])
+        in_box = and_(
+            Place.latitude.between(min_lat, max_lat),
+            or_(*[Place.longitude.between(low, high) for low, high in lon_spans])
+        )
+        candidates = self.query(fields, Place.latitude, Place.longitude).filter(cells, in_box).all()
+
+        matches = []
+        for place in candidates:
+            distance = haversine_km(latitude, longitude, place.latitude, place.longitude)
+            if distance <= radius_km:
+                matches.append((place, distance))
+        matches.sort(key=lambda match: match[1])
+        return matches[:limit]
+
+    def text_search(self, query: str, limit: int,
+                    cursor: Optional[str] = None,
+                    fields: Optional[Sequence[str]] = None) -> Tuple[List[Place], Optional[str]]:
+        """Return a page of the places matching `query`, best bm25 score first."""
+        after = decode_cursor(cursor, self.TEXT_SEARCH_KEY) if cursor else None
+        hits = search_places(db.session.connection(), query, limit + 1, after)
+        next_cursor = encode_cursor(hits[limit - 1][:2]) if len(hits) > limit else None
+        place_ids = [place_id for _, _, place_id in hits[:limit]]
+
+        query = self.query(fields).add_columns(Place.id.label('hit_id'))
+        places = {place.hit_id: place for place in query.filter(Place.id.in_(place_ids))}
+        return [places[place_id] for place_id in place_ids if place_id in places], next_cursor
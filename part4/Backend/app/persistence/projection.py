@@ -0,0 +1,81 @@
+"""
+Read-only rows of a model, selected with SQLAlchemy Core instead of the ORM.
+
+A RecordQuery builds a Core select of some columns of a model's table and
+executes it on the session's connection: rows skip the identity map, attribute
+instrumentation and validators, and come back as Projection objects, plain
+holders of the column values which serialize exactly like the model would,
+minus the columns left out. Listings use them; writes go through the ORM.
+"""
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import inspect, select
+
+from app.extensions import db
+from app.models.serializer import serializer_for
+
+
+class Projection:
+    """Some column values of one row of `model`, accessible as attributes."""
+
+    def __init__(self, model: type, values: Iterable):
+        self._model = model
+        self.__dict__.update(values)
+
+    def to_dict(self, excluded_attr: Iterable[str] = (), include: Iterable[str] = (),
+                only: Optional[Iterable[str]] = None) -> dict:
+        if include:
+            raise ValueError(f"{self._model.__name__} projections cannot include related objects")
+        return serializer_for(self._model)(self, excluded_attr, (), only)
+
+
+@lru_cache(maxsize=256)
+def _columns(model: type, keys: Tuple[str, ...]) -> tuple:
+    """The table columns of the attributes `keys` of `model`, labelled with the attribute keys."""
+    attrs = inspect(model).column_attrs
+    return tuple(attrs[key].columns[0].label(key) for key in keys)
+
+
+class RecordQuery:
+    """
+    The subset of the ORM Query interface the repositories read with, over a
+    Core select of the columns `keys` of `model`. Builder methods return a new
+    query; iterating executes it.
+    """
+
+    def __init__(self, model: type, keys: Tuple[str, ...], statement=None):
+        self.model = model
+        self.keys = keys
+        self.statement = statement if statement is not None else select(*_columns(model, keys))
+
+    def _derive(self, statement, keys: Optional[Tuple[str, ...]] = None) -> "RecordQuery":
+        return RecordQuery(self.model, keys or self.keys, statement)
+
+    def filter(self, *criteria) -> "RecordQuery":
+        return self._derive(self.statement.where(*criteria))
+
+    def order_by(self, *clauses) -> "RecordQuery":
+        return self._derive(self.statement.order_by(*clauses))
+
+    def limit(self, limit: int) -> "RecordQuery":
+        return self._derive(self.statement.limit(limit))
+
+    def add_columns(self, *columns) -> "RecordQuery":
+        """Select labelled `columns` too, exposed as attributes of the records."""
+        return self._derive(self.statement.add_columns(*columns),
+                            self.keys + tuple(column.key for column in columns))
+
+    def execution_options(self, **options) -> "RecordQuery":
+        return self._derive(self.statement.execution_options(**options))
+
+    def __iter__(self) -> Iterator[Projection]:
+        model, keys = self.model, self.keys
+        for row in db.session.connection().execute(self.statement):
+            yield Projection(model, zip(keys, row))
+
+    def all(self) -> List[Projection]:
+        return list(self)
+
+    def first(self) -> Optional[Projection]:
+        return next(iter(self.limit(1)), None)
@@ -1,9 +1,34 @@
 from abc import ABC, abstractmethod
-from typing import Optional, List, TypeVar, Generic, Dict
+from datetime import datetime
+from itertools import islice
+from typing import Optional, List, TypeVar, Generic, Dict, Iterable, Iterator, Sequence, Tuple
+from sqlalchemy import func, inspect, select, tuple_
+from sqlalchemy.orm import load_only
 from app.extensions import db
+from app.models.base import BaseModel
+from app.persistence.loading import include_paths, loader_options, profile_options
+from app.persistence.pagination import keyset_page
+from app.persistence.projection import RecordQuery
+from app.persistence.unit_of_work import commit, unit_of_work
+from app.models.serializer import serializer_for
 
 T = TypeVar('T')
 
+
+class BulkError(ValueError):
+    """Rows of a bulk write failed validation: `errors` holds their (position, message)."""
+
+    def __init__(self, errors: List[Tuple[int, str]]):
+        super().__init__('; '.join(f"row {position}: {message}" for position, message in errors))
+        self.errors = errors
+
+
+def batches(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of `size` consecutive items of `iterable`, the last one possibly shorter."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
 class Repository(ABC, Generic[T]):
     @abstractmethod
     def add(self, obj: T) -> None:
@@ -13,6 +38,10 @@ class Repository(ABC, Generic[T]):
     def get(self, obj_id: int) -> Optional[T]:
         pass
 
+    @abstractmethod
+    def get_many(self, obj_ids: Iterable) -> Tuple[List[T], list]:
+        pass
+
     @abstractmethod
     def get_all(self) -> List[T]:
         pass
@@ -42,6 +71,11 @@ class InMemoryRepository(Repository[T]):
     def get(self, obj_id: int) -> Optional[T]:
         return self._storage.get(obj_id)
 
+    def get_many(self, obj_ids: Iterable) -> Tuple[List[T], list]:
+        obj_ids = list(dict.fromkeys(obj_ids))
+        return ([self._storage[obj_id] for obj_id in obj_ids if obj_id in self._storage],
+                [obj_id for obj_id in obj_ids if obj_id not in self._storage])
+
     def get_all(self) -> List[T]:
         return list(self._storage.values())
 
@@ -62,33 +96,221 @@ class InMemoryRepository(Repository[T]):
 
 
 class SQLAlchemyRepository(Repository[T]):
+    # Number of objects written per flush by add_many and upsert_many
+    BATCH_SIZE = 500
+
     def __init__(self, model: T):
         self.model = model
         
     def add(self, obj: T) -> Optional[T]:
         db.session.add(obj)
-        db.session.commit()
+        commit()
         return obj
 
-    def get(self, obj_id: int) -> Optional[T]:
-        return self.model.query.get(obj_id)
+    def add_many(self, objs: Iterable[T], batch_size: Optional[int] = None) -> int:
+        """
+        Add `objs` with one flush per `batch_size` objects and a single commit,
+        or none if any fails, and return how many were added.
 
-    def get_all(self) -> List[T]:
-        return self.model.query.all()
+        Each flush sends the INSERTs of a table as one executemany; the mapper
+        and session events keeping the search indexes and facets up to date run
+        as for add. `objs` can be a generator: only one batch is held at a time.
+        """
+        count = 0
+        with unit_of_work():
+            for batch in batches(objs, batch_size or self.BATCH_SIZE):
+                db.session.add_all(batch)
+                db.session.flush()
+                count += len(batch)
+        return count
+
+    def build(self, values: dict) -> T:
+        """
+        Return a new, unsaved object with the attribute `values`.
+
+        Unlike the constructor, `values` can set foreign keys, e.g. owner_id,
+        instead of related objects. The attribute validators run as usual; a
+        missing required column or an unknown attribute raises ValueError.
+        """
+        mapper = inspect(self.model)
+        unknown = [key for key in values if key not in mapper.attrs]
+        if unknown:
+            raise ValueError(f"unknown attributes: {', '.join(unknown)}")
+        # A related object sets the foreign keys referring to it
+        provided = set(values)
+        for key in [key for key in values if key in mapper.relationships]:
+            provided.update(mapper.get_property_by_column(column).key
+                            for column in mapper.relationships[key].local_columns)
+        missing = [attr.key for attr in mapper.column_attrs
+                   if attr.key not in provided and not any(column.nullable or column.default is not None
+                                                         for column in attr.columns)]
+        if missing:
+            raise ValueError(f"missing attributes: {', '.join(missing)}")
+        obj = mapper.class_manager.new_instance()
+        BaseModel.__init__(obj)
+        for key, value in values.items():
+            setattr(obj, key, value)
+        return obj
+
+    def upsert_many(self, rows: Iterable[dict], conflict_keys: Sequence[str] = ('id',),
+                    batch_size: Optional[int] = None) -> Tuple[int, int]:
+        """
+        Insert `rows`, dicts of attribute values, or update the existing object
+        with the same values of the unique `conflict_keys`. Return the number
+        of (inserted, updated) rows.
+
+        Each batch is matched against the table with one IN query, then written
+        with one flush, all in a single commit, or none if any row fails: a row
+        failing validation raises BulkError. Rows go through build and the ORM
+        rather than INSERT ... ON CONFLICT so that the validators, e.g. password
+        hashing, and the events maintaining the derived data still run.
+        """
+        batch_size = batch_size or self.BATCH_SIZE
+        key_columns = [getattr(self.model, key) for key in conflict_keys]
+        inserted = updated = 0
+        with unit_of_work():
+            for number, batch in enumerate(batches(rows, batch_size)):
+                keys = [tuple(row.get(key) for key in conflict_keys) for row in batch]
+                lookup = [key for key in keys if None not in key]
+                if not lookup:
+                    existing = {}
+                elif len(key_columns) == 1:
+                    existing = {(getattr(obj, conflict_keys[0]),): obj for obj in
+                                self.model.query.filter(key_columns[0].in_([key for key, in lookup]))}
+                else:
+                    existing = {tuple(getattr(obj, key) for key in conflict_keys): obj for obj in
+                                self.model.query.filter(tuple_(*key_columns).in_(lookup))}
+                for position, (key, row) in enumerate(zip(keys, batch), number * batch_size):
+                    obj = existing.get(key)
+                    try:
+                        if obj is None:
+                            obj = self.build(row)
+                            db.session.add(obj)
+                            inserted += 1
+                        else:
+                            for attr, value in row.items():
+                                setattr(obj, attr, value)
+                            updated += 1
+                    except (TypeError, ValueError) as e:
+                        raise BulkError([(position, str(e))]) from e
+                    if None not in key:
+                        existing[key] = obj
+                db.session.flush()
+        return inserted, updated
+
+    def load_many(self, obj_ids: Iterable) -> Dict[str, T]:
+        """Return the ORM instances of `obj_ids` by id, for writes, with a single IN query."""
+        obj_ids = list(dict.fromkeys(obj_ids))
+        if not obj_ids:
+            return {}
+        return {obj.id: obj for obj in self.model.query.filter(self.model.id.in_(obj_ids))}
+
+    def query(self, fields: Optional[Sequence[str]] = None, *required) -> RecordQuery:
+        """
+        Read-only query of Projection records, through Core rather than the ORM.
+
+        Records hold the columns `fields`, every serialized column when None,
+        plus the `required` ones the query itself needs, e.g. its sort key.
+        Unrequested columns are never read.
+        """
+        keys = serializer_for(self.model).columns if fields is None else fields
+        return RecordQuery(self.model, tuple(dict.fromkeys([*keys, *(column.key for column in required)])))
+
+    def _loaded(self, options: Sequence, fields: Optional[Sequence[str]] = None):
+        """ORM query of the model with the loader `options`, reading only the columns `fields` if given."""
+        if fields is not None:
+            # Related objects need the ORM instance: only defer the other columns
+            options = (*options, load_only(*[getattr(self.model, field) for field in fields]))
+        return self.model.query.options(*options)
+
+    def get(self, obj_id: int, fields: Optional[Sequence[str]] = None,
+            profile: Optional[str] = None) -> Optional[T]:
+        """
+        Get an object: the ORM instance, with the relationships of the loading
+        `profile` if given, or else a Projection of `fields` when given.
+        """
+        if profile is not None:
+            return self._loaded(profile_options(self.model, profile), fields).filter(self.model.id == obj_id).first()
+        if fields is None:
+            return self.model.query.get(obj_id)
+        return self.query(fields).filter(self.model.id == obj_id).first()
+
+    def get_with(self, obj_id: str, include: Sequence[str] = (),
+                 fields: Optional[Sequence[str]] = None) -> Optional[T]:
+        """Get an object with the relations to_dict will `include` eagerly loaded."""
+        options = loader_options(self.model, include_paths(self.model, include))
+        return self._loaded(options, fields).filter(self.model.id == obj_id).first()
+
+    def get_many(self, obj_ids: Iterable, fields: Optional[Sequence[str]] = None,
+                 profile: Optional[str] = None) -> Tuple[List[T], list]:
+        """
+        Fetch the objects of `obj_ids` with a single IN query, plus those of
+        the relationships of the loading `profile` if given.
+
+        Return them in the order of `obj_ids`, without duplicates, along with
+        the ids that matched no object.
+        """
+        obj_ids = list(dict.fromkeys(obj_ids))
+        if profile is not None:
+            query = self._loaded(profile_options(self.model, profile), fields)
+        else:
+            query = self.query(fields, self.model.id)
+        found = {obj.id: obj for obj in query.filter(self.model.id.in_(obj_ids))} if obj_ids else {}
+        return ([found[obj_id] for obj_id in obj_ids if obj_id in found],
+                [obj_id for obj_id in obj_ids if obj_id not in found])
+
+    def get_all(self, fields: Optional[Sequence[str]] = None, profile: Optional[str] = None) -> List[T]:
+        """
+        Return every object: Projections of `fields`, or with a loading
+        `profile`, ORM instances with the relationships of the profile.
+        """
+        if profile is not None:
+            return self._loaded(profile_options(self.model, profile), fields).all()
+        return self.query(fields).all()
+
+    def iter_all(self, batch_size: int = 1000, fields: Optional[Sequence[str]] = None) -> Iterator[T]:
+        """
+        Yield every object ordered by (created_at, id), fetching `batch_size`
+        rows at a time from the cursor instead of loading the whole table.
+        """
+        query = self.query(fields).order_by(self.model.created_at, self.model.id)
+        return iter(query.execution_options(yield_per=batch_size))
+
+    def get_page(self, limit: int, cursor: Optional[str] = None,
+                 fields: Optional[Sequence[str]] = None) -> Tuple[List[T], Optional[str]]:
+        """Return `limit` objects ordered by (created_at, id) and the next page cursor."""
+        columns = (self.model.created_at, self.model.id)
+        return keyset_page(self.query(fields, *columns), columns, limit, cursor)
+
+    def version(self, obj_id: Optional[str] = None) -> Optional[Tuple[Optional[datetime], Optional[int]]]:
+        """
+        Return the (updated_at, None) of an object, None if it does not exist, or
+        without `obj_id` the (max(updated_at), count) of the whole table: a
+        single-row probe telling whether anything changed since the last read.
+        """
+        if obj_id is None:
+            # Two subqueries: SQLite answers each alone from an index, not together
+            return tuple(db.session.execute(select(
+                select(func.max(self.model.updated_at)).scalar_subquery(),
+                select(func.count()).select_from(self.model).scalar_subquery(),
+            )).one())
+        updated_at = db.session.execute(
+            select(self.model.updated_at).where(self.model.id == obj_id)).first()
+        return (updated_at[0], None) if updated_at else None
 
     def update(self, obj_id: int, data: dict) -> Optional[T]:
         obj = self.get(obj_id)
         if obj:
             for key, value in data.items():
                 setattr(obj, key, value)
-            db.session.commit()
+            commit()
         return obj
 
     def delete(self, obj_id: int) -> None:
         obj = self.get(obj_id)
         if obj:
             db.session.delete(obj)
-            db.session.commit()
+            commit()
 
     def get_by_attribute(self, attr_name: str, attr_value) -> Optional[T]:
         return self.model.query.filter_by(**{attr_name: attr_value}).first()
\ No newline at end of file
@@ -1,7 +1,41 @@
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+
+from app.extensions import db
+from app.persistence.pagination import keyset_page
 from app.persistence.repository import SQLAlchemyRepository
+from app.models.place import Place
 from app.models.review import Review
 
 class ReviewRepository(SQLAlchemyRepository[Review]):
     def __init__(self):
         super().__init__(Review)
-    
+
+    def get_place_page(self, place_id: str, limit: int, cursor: Optional[str] = None,
+                       min_rating: Optional[int] = None,
+                       fields: Optional[Sequence[str]] = None) -> Tuple[List[Review], Optional[str]]:
+        """
+        Return the `limit` latest reviews of a place and the next page cursor.
+
+        Pages follow (created_at DESC, id DESC) along the (place_id, created_at, id)
+        index, so the first page only reads `limit` index entries however many
+        reviews the place has.
+        """
+        columns = (Review.created_at, Review.id)
+        query = self.query(fields, *columns).filter(Review.place_id == place_id)
+        if min_rating is not None:
+            query = query.filter(Review.rating >= min_rating)
+        return keyset_page(query, columns, limit, cursor, descending=True)
+
+    def place_version(self, place_id: str) -> Optional[Tuple[Optional[datetime], int]]:
+        """
+        Return the (max(updated_at), count) of the reviews of a place, or None
+        if the place does not exist.
+        """
+        return db.session.execute(
+            select(func.max(Review.updated_at), func.count(Review.id))
+            .select_from(Place).outerjoin(Review, Review.place_id == Place.id)
+            .where(Place.id == place_id).group_by(Place.id)
+        ).first()
@@ -0,0 +1,74 @@
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models.place import Place
+
+
+def normalize(title: str) -> str:
+    """Lower-case a title, strip its accents and collapse its whitespace."""
+    decomposed = unicodedata.normalize("NFKD", title)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+class TitleIndex:
+    """
+    In-process sorted array of the normalized place titles, for type-ahead.
+
+    Entries are (normalized title, place id, title) tuples kept in order, so
+    the titles starting with a prefix are a contiguous slice found by bisection.
+    The index is built once and then patched one place at a time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._entries: List[Tuple[str, str, str]] = []
+        self._titles: Dict[str, str] = {}
+
+    def build(self):
+        """Rebuild the whole index from the database."""
+        rows = db.session.execute(select(Place.id, Place.title)).all()
+        entries = sorted((normalize(title), place_id, title) for place_id, title in rows)
+        with self._lock:
+            self._entries = entries
+            self._titles = {place_id: title for place_id, title in rows}
+
+    def _remove(self, place_id: str):
+        title = self._titles.pop(place_id, None)
+        if title is None:
+            return
+        entry = (normalize(title), place_id, title)
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def set(self, place_id: str, title: str):
+        """Add a place or replace its title."""
+        with self._lock:
+            self._remove(place_id)
+            self._titles[place_id] = title
+            insort(self._entries, (normalize(title), place_id, title))
+
+    def remove(self, place_id: str):
+        with self._lock:
+            self._remove(place_id)
+
+    def suggest(self, prefix: str, limit: int) -> List[Dict[str, str]]:
+        """Return the first `limit` places, alphabetically, whose title starts with `prefix`."""
+        prefix = normalize(prefix)
+        entries = self._entries
+        position = bisect_left(entries, (prefix,))
+        suggestions = []
+        for key, place_id, title in entries[position:position + limit]:
+            if not key.startswith(prefix):
+                break
+            suggestions.append({'id': place_id, 'title': title})
+        return suggestions
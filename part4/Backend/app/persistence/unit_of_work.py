@@ -0,0 +1,103 @@
+"""
+Unit of work: one transaction, and a single commit, per request.
+
+Inside a unit of work, the repositories and BaseModel.save only flush their
+changes; the unit commits them all when it ends, or rolls them all back if it
+fails. create_app opens one around every request: it commits before the
+response is sent, unless the response is an error, and rolls back on
+exceptions. Scripts open one with `with unit_of_work():`. Outside any unit,
+commit() commits right away, as before.
+"""
+from contextlib import contextmanager
+from typing import Callable
+
+from sqlalchemy import event
+
+from app.extensions import db
+
+_DEPTH = 'unit_of_work'
+_CALLBACKS = 'on_commit'
+
+
+def in_unit_of_work() -> bool:
+    return db.session.info.get(_DEPTH, 0) > 0
+
+
+def commit():
+    """Make the pending changes part of the transaction: commit now, or flush inside a unit of work."""
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+
+def on_commit(callback: Callable[[], None]):
+    """Run `callback` once the current changes are committed: now outside a unit of work."""
+    if in_unit_of_work():
+        db.session.info.setdefault(_CALLBACKS, []).append(callback)
+    else:
+        callback()
+
+
+def begin():
+    db.session.info[_DEPTH] = db.session.info.get(_DEPTH, 0) + 1
+
+
+def end(success: bool = True):
+    """Close a unit of work; the outermost one commits if `success`, else rolls back."""
+    depth = db.session.info.get(_DEPTH, 0) - 1
+    db.session.info[_DEPTH] = max(depth, 0)
+    if depth > 0:
+        return
+    if success:
+        db.session.commit()
+    else:
+        db.session.rollback()
+
+
+def abort():
+    """Roll back the unit of work in progress, whatever its depth."""
+    db.session.info[_DEPTH] = 0
+    db.session.rollback()
+
+
+@contextmanager
+def unit_of_work():
+    begin()
+    try:
+        yield
+    except BaseException:
+        end(success=False)
+        raise
+    end()
+
+
+@event.listens_for(db.session, "after_commit")
+def _run_callbacks(session):
+    for callback in session.info.pop(_CALLBACKS, []):
+        callback()
+
+
+@event.listens_for(db.session, "after_rollback")
+def _discard_callbacks(session):
+    session.info.pop(_CALLBACKS, None)
+
+
+def init_unit_of_work(app):
+    """Wrap every request of `app` in a unit of work, unless UNIT_OF_WORK is off."""
+    if not app.config['UNIT_OF_WORK']:
+        return
+
+    @app.before_request
+    def _begin():
+        begin()
+
+    @app.after_request
+    def _commit(response):
+        end(success=response.status_code < 400)
+        return response
+
+    @app.teardown_request
+    def _rollback(exc):
+        if exc is not None or in_unit_of_work():
+            abort()
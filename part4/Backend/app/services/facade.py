@@ -1,9 +1,13 @@
+from itertools import chain
 from typing import Optional
 
 from app.persistence.user_repository import UserRepository
 from app.persistence.place_repository import PlaceRepository
 from app.persistence.amenity_repository import AmenityRepository
 from app.persistence.review_repository import ReviewRepository
+from app.persistence.repository import BulkError, batches
+from app.persistence.title_index import TitleIndex
+from app.persistence.unit_of_work import on_commit, unit_of_work
 
 from app.models.user import User
 from app.models.amenity import Amenity
@@ -16,6 +20,12 @@ class HBnBFacade:
         self.amenity_repo = AmenityRepository()
         self.place_repo = PlaceRepository()
         self.review_repo = ReviewRepository()
+        self.place_titles = TitleIndex()
+
+    def load_indexes(self):
+        """Build the in-memory search indexes from the database."""
+        self.place_repo.amenity_index.build()
+        self.place_titles.build()
 
     # USER
     def create_user(self, user_data):
@@ -23,11 +33,20 @@ class HBnBFacade:
         self.user_repo.add(user)
         return user
     
-    def get_users(self):
-        return self.user_repo.get_all()
+    def get_users(self, fields=None, profile=None):
+        return self.user_repo.get_all(fields=fields, profile=profile)
+
+    def iter_users(self, fields=None):
+        return self.user_repo.iter_all(fields=fields)
+
+    def get_user(self, user_id, fields=None, profile=None) -> Optional[User]:
+        return self.user_repo.get(user_id, fields=fields, profile=profile)
 
-    def get_user(self, user_id) -> Optional[User]:
-        return self.user_repo.get(user_id)
+    def get_users_by_ids(self, user_ids, fields=None):
+        return self.user_repo.get_many(user_ids, fields=fields)
+
+    def get_users_version(self, user_id=None):
+        return self.user_repo.version(user_id)
 
     def get_user_by_email(self, email) -> Optional[User]:
         return self.user_repo.get_user_by_email(email=email)
@@ -41,11 +60,17 @@ class HBnBFacade:
         self.amenity_repo.add(amenity)
         return amenity
 
-    def get_amenity(self, amenity_id):
-        return self.amenity_repo.get(amenity_id)
+    def get_amenity(self, amenity_id, fields=None):
+        return self.amenity_repo.get(amenity_id, fields=fields)
+
+    def get_all_amenities(self, fields=None):
+        return self.amenity_repo.get_all(fields=fields)
 
-    def get_all_amenities(self):
-        return self.amenity_repo.get_all()
+    def iter_amenities(self, fields=None):
+        return self.amenity_repo.iter_all(fields=fields)
+
+    def get_amenities_version(self, amenity_id=None):
+        return self.amenity_repo.version(amenity_id)
 
     def update_amenity(self, amenity_id, amenity_data):
         self.amenity_repo.update(amenity_id, amenity_data)
@@ -69,16 +94,123 @@ class HBnBFacade:
                 place.amenities.append(amenity)
         
         self.place_repo.add(place)
+        on_commit(lambda: self.place_titles.set(place.id, place.title))
         return place
 
-    def get_place(self, place_id) -> Place:
-        return self.place_repo.get(place_id)
+    def create_places(self, rows, owner_id, batch_size=None):
+        """
+        Create the places of the dicts `rows`, owned by `owner_id`, and return
+        how many were created.
+
+        Rows are validated and written in batches; the amenities of a batch are
+        fetched with one query. Every invalid row is reported, with its position
+        in `rows`, by a BulkError raised once all are checked: then no place is
+        created.
+        """
+        owner = self.user_repo.get(owner_id)
+        if not owner:
+            raise KeyError('Invalid input data')
+        batch_size = batch_size or self.place_repo.BATCH_SIZE
+        errors, titles = [], []
+
+        def places():
+            for number, batch in enumerate(batches(rows, batch_size)):
+                amenities = self.amenity_repo.load_many(
+                    chain.from_iterable(row.get('amenities') or () for row in batch))
+                for position, row in enumerate(batch, number * batch_size):
+                    row = dict(row, owner_id=owner.id)
+                    row.setdefault('description', '')
+                    amenity_ids = list(dict.fromkeys(row.pop('amenities', None) or ()))
+                    try:
+                        unknown = [amenity_id for amenity_id in amenity_ids if amenity_id not in amenities]
+                        if unknown:
+                            raise KeyError(f"Invalid amenity id: {', '.join(unknown)}")
+                        place = self.place_repo.build(row)
+                        place.amenities = [amenities[amenity_id] for amenity_id in amenity_ids]
+                    except (KeyError, TypeError, ValueError) as e:
+                        errors.append((position, e.args[0] if isinstance(e, KeyError) else str(e)))
+                        continue
+                    titles.append((place.id, place.title))
+                    yield place
+
+        with unit_of_work():
+            count = self.place_repo.add_many(places(), batch_size)
+            if errors:
+                raise BulkError(errors)
+        on_commit(lambda: [self.place_titles.set(place_id, title) for place_id, title in titles])
+        return count
+
+    def get_place(self, place_id, fields=None, profile=None) -> Place:
+        return self.place_repo.get(place_id, fields=fields, profile=profile)
+
+    def get_place_with(self, place_id, include, fields=None):
+        return self.place_repo.get_with(place_id, include, fields=fields)
+
+    def get_places_by_ids(self, place_ids, fields=None, profile=None):
+        return self.place_repo.get_many(place_ids, fields=fields, profile=profile)
+
+    def get_all_places(self, profile=None):
+        return self.place_repo.get_all(profile=profile)
+
+    def iter_places(self, fields=None):
+        return self.place_repo.iter_all(fields=fields)
+
+    def get_places_version(self, place_id=None):
+        return self.place_repo.version(place_id)
+
+    def get_places_page(self, limit, cursor=None, min_price=None, max_price=None, sort='created_at',
+                        amenities=None, match_all=True, fields=None, below_price=None):
+        return self.place_repo.search(limit, cursor, min_price=min_price, max_price=max_price, sort=sort,
+                                      below_price=below_price, amenities=amenities, match_all=match_all,
+                                      fields=fields)
 
-    def get_all_places(self):
-        return self.place_repo.get_all()
+    def get_places_relations(self, places, include):
+        """
+        Load the relations `include` (owner, amenities) of a list of places, in
+        one query per relation: return, for each, the id or ids every place
+        refers to and the related objects by id.
+        """
+        relations = {}
+        if 'owner' in include:
+            owner_ids = {place.id: place.owner_id for place in places}
+            owners, _ = self.user_repo.get_many(owner_ids.values(), fields=Place.serialized_relations['owner']['only'])
+            relations['owner'] = (owner_ids, {owner.id: owner for owner in owners})
+        if 'amenities' in include:
+            amenity_ids = self.place_repo.get_amenity_ids(place.id for place in places)
+            amenities, _ = self.amenity_repo.get_many(
+                {amenity_id for ids in amenity_ids.values() for amenity_id in ids},
+                fields=Place.serialized_relations['amenities']['only'])
+            relations['amenities'] = (amenity_ids, {amenity.id: amenity for amenity in amenities})
+        return relations
+
+    def get_place_facets(self):
+        return self.place_repo.get_facets()
+
+    def rebuild_place_facets(self):
+        self.place_repo.rebuild_facets()
+
+    def search_places(self, query, limit, cursor=None, fields=None):
+        return self.place_repo.text_search(query, limit, cursor, fields=fields)
+
+    def get_places_nearby(self, latitude, longitude, radius_km, limit, fields=None):
+        return self.place_repo.nearby(latitude, longitude, radius_km, limit, fields=fields)
+
+    def suggest_places(self, prefix, limit):
+        return self.place_titles.suggest(prefix, limit)
 
     def update_place(self, place_id, place_data):
-        self.place_repo.update(place_id, place_data)
+        place = self.place_repo.update(place_id, place_data)
+        if place and 'title' in place_data:
+            title = place.title
+            on_commit(lambda: self.place_titles.set(place_id, title))
+
+    def add_place_amenities(self, place_id, amenity_ids):
+        place = self.place_repo.get(place_id)
+        for amenity_id in amenity_ids:
+            amenity = self.get_amenity(amenity_id)
+            if amenity not in place.amenities:
+                place.amenities.append(amenity)
+        place.save()
 
     # REVIEWS
     def create_review(self, review_data):
@@ -96,31 +228,37 @@ class HBnBFacade:
 
         review = Review(**review_data)
         self.review_repo.add(review)
-        user.add_review(review)
-        place.add_review(review)
         return review
         
-    def get_review(self, review_id):
-        return self.review_repo.get(review_id)
+    def get_review(self, review_id, fields=None, profile=None):
+        return self.review_repo.get(review_id, fields=fields, profile=profile)
 
-    def get_all_reviews(self):
-        return self.review_repo.get_all()
+    def get_reviews_by_ids(self, review_ids, fields=None):
+        return self.review_repo.get_many(review_ids, fields=fields)
+
+    def get_all_reviews(self, fields=None, profile=None):
+        return self.review_repo.get_all(fields=fields, profile=profile)
+
+    def iter_reviews(self, fields=None):
+        return self.review_repo.iter_all(fields=fields)
+
+    def get_reviews_version(self, review_id=None):
+        return self.review_repo.version(review_id)
 
     def get_reviews_by_place(self, place_id):
-        place = self.place_repo.get(place_id)
+        place = self.place_repo.get_with(place_id, ['reviews'])
         if not place:
             raise KeyError('Place not found')
         return place.reviews
 
+    def get_place_reviews_page(self, place_id, limit, cursor=None, min_rating=None, fields=None):
+        return self.review_repo.get_place_page(place_id, limit, cursor, min_rating=min_rating, fields=fields)
+
+    def get_place_reviews_version(self, place_id):
+        return self.review_repo.place_version(place_id)
+
     def update_review(self, review_id, review_data):
         self.review_repo.update(review_id, review_data)
 
     def delete_review(self, review_id):
-        review = self.review_repo.get(review_id)
-        
-        user = self.user_repo.get(review.user.id)
-        place = self.place_repo.get(review.place.id)
-
-        user.delete_review(review)
-        place.delete_review(review)
         self.review_repo.delete(review_id)
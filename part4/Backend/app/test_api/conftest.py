@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from app.extensions import db
+from app.models.place import Place
+from app.models.user import User
+
+
+@pytest.fixture
+def app():
+    app = create_app("config.TestingConfig")
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def owner(app):
+    user = User(first_name="Alice", last_name="Smith", email="alice@example.com", password="secret")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def make_place(owner):
+    def _make_place(title="Cozy Apartment", price=100, latitude=48.85, longitude=2.35, **kwargs):
+        place = Place(title=title, price=price, latitude=latitude, longitude=longitude,
+                      owner=kwargs.pop("owner", owner), **kwargs)
+        db.session.add(place)
+        db.session.commit()
+        return place
+    return _make_place
+
+
+@pytest.fixture
+def count_queries(app):
+    """Run a callable and return its result with the number of SQL statements it executed."""
+    def _count_queries(action):
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            result = action()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        return result, len(statements)
+    return _count_queries
@@ -0,0 +1,49 @@
+import gzip
+import json
+
+
+def _places(make_place, count):
+    for n in range(count):
+        make_place(title=f"Place {n}", description="Quiet flat with a view on the river " * 5)
+
+
+def test_listing_compressed_when_accepted(client, make_place):
+    _places(make_place, 10)
+    identity = client.get('/api/v1/places/')
+    response = client.get('/api/v1/places/', headers={'Accept-Encoding': 'br;q=0, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) == len(response.data) < len(identity.data)
+    assert gzip.decompress(response.data) == identity.data
+
+    assert 'Content-Encoding' not in identity.headers
+    assert 'Accept-Encoding' in identity.headers['Vary']
+    refused = client.get('/api/v1/places/', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in refused.headers
+
+
+def test_small_responses_left_uncompressed(client, owner):
+    response = client.get(f'/api/v1/users/{owner.id}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json()['email'] == "alice@example.com"
+
+
+def test_streamed_listing_compressed(client, make_place):
+    _places(make_place, 3)
+    response = client.get('/api/v1/places/', headers={'Accept': 'application/x-ndjson', 'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    lines = gzip.decompress(response.data).decode('utf-8').splitlines()
+    assert sorted(json.loads(line)['title'] for line in lines) == ["Place 0", "Place 1", "Place 2"]
+
+
+def test_compressed_responses_revalidate(client, make_place):
+    _places(make_place, 10)
+    response = client.get('/api/v1/places/', headers={'Accept-Encoding': 'gzip'})
+    etag = response.headers['ETag']
+    assert etag.startswith('W/"')
+
+    revalidated = client.get('/api/v1/places/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304 and not revalidated.data
+    assert 'Content-Encoding' not in revalidated.headers
@@ -0,0 +1,82 @@
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+def _statements(request):
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        response = request()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    return response, statements
+
+
+def test_listing_revalidated_with_etag(client, make_place):
+    make_place(title="Loft")
+    response = client.get('/api/v1/places/?limit=5')
+    etag = response.headers['ETag']
+    assert response.status_code == 200 and 'Last-Modified' not in response.headers
+
+    revalidated, statements = _statements(
+        lambda: client.get('/api/v1/places/?limit=5', headers={'If-None-Match': etag}))
+    assert revalidated.status_code == 304 and not revalidated.data
+    assert revalidated.headers['ETag'] == etag
+    assert len(statements) == 1 and 'max(places.updated_at)' in statements[0]
+
+    other_query = client.get('/api/v1/places/?limit=6', headers={'If-None-Match': etag})
+    assert other_query.status_code == 200 and other_query.headers['ETag'] != etag
+
+
+def test_etag_changes_with_writes(client, make_place):
+    place = make_place(title="Loft")
+    place_id = place.id
+    listing = client.get('/api/v1/places/').headers['ETag']
+    detail = client.get(f'/api/v1/places/{place_id}').headers['ETag']
+
+    place.update({'price': 120})
+    assert client.get(f'/api/v1/places/{place_id}', headers={'If-None-Match': detail}).status_code == 200
+    updated = client.get('/api/v1/places/', headers={'If-None-Match': listing})
+    assert updated.status_code == 200 and updated.headers['ETag'] != listing
+
+    listing = updated.headers['ETag']
+    second = make_place(title="Cabin")
+    assert client.get('/api/v1/places/', headers={'If-None-Match': listing}).status_code == 200
+
+    listing = client.get('/api/v1/places/').headers['ETag']
+    db.session.delete(second)
+    db.session.commit()
+    assert client.get('/api/v1/places/', headers={'If-None-Match': listing}).status_code == 200
+
+
+def test_if_modified_since(client, owner):
+    response = client.get(f'/api/v1/users/{owner.id}')
+    last_modified = response.headers['Last-Modified']
+    assert client.get(f'/api/v1/users/{owner.id}',
+                      headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get(f'/api/v1/users/{owner.id}',
+                      headers={'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}).status_code == 200
+
+
+def test_collections_are_not_validated_by_date(client, make_place):
+    make_place(title="Loft")
+    second = make_place(title="Cabin")
+    last_modified = client.get(f'/api/v1/places/{second.id}').headers['Last-Modified']
+    client.get('/api/v1/places/?fields=id')
+    db.session.delete(second)
+    db.session.commit()
+    listing = client.get('/api/v1/places/?fields=id', headers={'If-Modified-Since': last_modified})
+    assert listing.status_code == 200 and len(listing.get_json()) == 1
+
+
+def test_unvalidated_responses(client, make_place):
+    place = make_place()
+    assert 'ETag' not in client.get('/api/v1/places/unknown').headers
+    assert 'ETag' not in client.get(f'/api/v1/places/{place.id}?include=owner').headers
+    assert 'ETag' not in client.get('/api/v1/places/?amenities=unknown').headers
+    assert 'ETag' not in client.get('/api/v1/places/?limit=x').headers
+    reviews = client.get(f'/api/v1/places/{place.id}/reviews/')
+    assert reviews.status_code == 200 and reviews.headers['ETag']
+    assert client.get('/api/v1/places/unknown/reviews/').status_code == 404
@@ -0,0 +1,95 @@
+import pytest
+
+from app.extensions import db
+from app.models.amenity import Amenity
+from app.models.review import Review
+from app.models.user import User
+from app.services import facade
+
+
+def _add_places(make_place, numbers, first_place=None):
+    """
+    Add a place with an amenity and a review by a new guest for each of
+    `numbers`; the guests also review `first_place` if given. Return the places.
+    """
+    wifi = Amenity.query.filter_by(name="WiFi").one()
+    places = []
+    for n in numbers:
+        place = make_place(title=f"Place {n}", price=50 + n)
+        place.amenities.append(wifi)
+        guest = User(first_name=f"Guest{n}", last_name="Doe", email=f"guest{n}@example.com", password="secret")
+        db.session.add(Review(text="Nice", rating=4, place=place, user=guest))
+        if first_place is not None:
+            db.session.add(Review(text="Again", rating=5, place=first_place, user=guest))
+        places.append(place)
+    db.session.commit()
+    return places
+
+
+def _read_profiles():
+    places = facade.get_all_places(profile='detail')
+    reviews = facade.get_all_reviews(profile='admin')
+    users = facade.get_users(profile='admin')
+    return (
+        [(place.owner.first_name, [amenity.name for amenity in place.amenities],
+          [review.user.first_name for review in place.reviews]) for place in places],
+        [(review.user.first_name, review.place.owner.first_name) for review in reviews],
+        [([place.title for place in user.places], [review.place.title for review in user.reviews]) for user in users],
+    )
+
+
+def test_loading_profiles_take_constant_queries(owner, make_place, count_queries):
+    first_place, = _add_places(make_place, range(1))
+    first_id = first_place.id
+    db.session.expire_all()
+    (places, reviews, users), queries = count_queries(_read_profiles)
+    assert (len(places), len(reviews), len(users)) == (1, 1, 3)
+
+    _add_places(make_place, range(1, 5), db.session.get(type(first_place), first_id))
+    db.session.expire_all()
+    (places, reviews, users), more_queries = count_queries(_read_profiles)
+    assert (len(places), len(reviews), len(users)) == (5, 9, 7)
+    assert [len(place_reviews) for _, _, place_reviews in places if place_reviews[0] == "Guest0"] == [5]
+    # places: owner joined, amenities, reviews with their user; reviews: user,
+    # place and its owner joined; users: places, reviews with their place
+    assert more_queries == queries == 3 + 1 + 3
+
+    place, queries = count_queries(lambda: facade.get_place(first_id, profile='card'))
+    assert queries == 2 and place.owner.first_name == "Alice"
+    assert count_queries(lambda: [amenity.name for amenity in place.amenities])[1] == 0
+
+
+def test_unknown_loading_profile(owner):
+    with pytest.raises(ValueError):
+        facade.get_all_places(profile='admin')
+    with pytest.raises(ValueError):
+        facade.get_user(owner.id, profile='card')
+
+
+ENDPOINTS = (
+    '/api/v1/places/',
+    '/api/v1/places/?include=owner,amenities',
+    '/api/v1/places/?include=owner,amenities&normalize=true',
+    '/api/v1/places/search?q=place&include=owner',
+    '/api/v1/places/{place_id}?include=owner,reviews,amenities',
+    '/api/v1/places/{place_id}/reviews/',
+    '/api/v1/reviews/',
+    '/api/v1/users/',
+    '/api/v1/amenities/',
+)
+
+
+def test_endpoint_queries_do_not_grow_with_rows(client, owner, make_place, count_queries):
+    first_place, = _add_places(make_place, range(1))
+    place_id = first_place.id
+
+    def endpoint_queries():
+        counts = {}
+        for url in ENDPOINTS:
+            response, counts[url] = count_queries(lambda: client.get(url.format(place_id=place_id)))
+            assert response.status_code == 200, url
+        return counts
+
+    queries = endpoint_queries()
+    _add_places(make_place, range(1, 5), first_place)
+    assert endpoint_queries() == queries
@@ -0,0 +1,646 @@
+import pytest
+
+
+def test_places_are_paginated_with_a_cursor(client, make_place):
+    ids = [make_place(title=f"Place {i}").id for i in range(5)]
+
+    response = client.get('/api/v1/places/?limit=2')
+    assert response.status_code == 200
+    assert [p['id'] for p in response.get_json()] == ids[:2]
+
+    seen = []
+    cursor = None
+    while True:
+        url = '/api/v1/places/?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url)
+        seen += [p['id'] for p in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert seen == ids
+
+
+def test_last_page_has_no_cursor(client, make_place):
+    make_place()
+    response = client.get('/api/v1/places/?limit=5')
+    assert len(response.get_json()) == 1
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_invalid_pagination_parameters(client):
+    assert client.get('/api/v1/places/?limit=abc').status_code == 400
+    assert client.get('/api/v1/places/?limit=0').status_code == 400
+    assert client.get('/api/v1/places/?cursor=not-a-cursor').status_code == 400
+
+
+def test_cursor_values_must_match_the_sort_key(client, make_place):
+    import base64
+    import json
+    make_place()
+
+    def cursor(*values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    for url, values in (('/api/v1/places/?', ("2024-01-01T00:00:00", {"a": 1})),
+                        ('/api/v1/places/?sort=price&', ("100", "id")),
+                        ('/api/v1/places/?sort=price&', (True, "id")),
+                        ('/api/v1/places/search?q=place&', (1.5, [1]))):
+        assert client.get(f'{url}cursor={cursor(*values)}').status_code == 400, values
+    assert client.get(f'/api/v1/places/?sort=price&cursor={cursor(100, "id")}').status_code == 200
+
+
+def test_places_filtered_by_price_range(client, make_place):
+    for price in (50, 100, 150, 200):
+        make_place(title=f"Place {price}", price=price)
+
+    response = client.get('/api/v1/places/?min_price=75&max_price=175')
+    assert sorted(p['price'] for p in response.get_json()) == [100, 150]
+
+
+def test_below_price_lists_the_places_of_the_cheaper_price_facets(client, make_place):
+    for price in (50, 99.5, 100, 150):
+        make_place(title=f"Place {price}", price=price)
+    buckets = client.get('/api/v1/places/facets').get_json()['price']
+    counted = sum(bucket['count'] for bucket in buckets if bucket['max'] is not None and bucket['max'] <= 100)
+    listed = client.get('/api/v1/places/?below_price=100').get_json()
+    assert sorted(p['price'] for p in listed) == [50, 99.5] and len(listed) == counted
+    assert client.get('/api/v1/places/?below_price=x').status_code == 400
+
+
+def test_places_sorted_by_price(client, make_place):
+    for price in (150, 50, 200, 100):
+        make_place(title=f"Place {price}", price=price)
+
+    response = client.get('/api/v1/places/?sort=price&limit=3')
+    assert [p['price'] for p in response.get_json()] == [50, 100, 150]
+    cursor = response.headers['X-Next-Cursor']
+    response = client.get(f'/api/v1/places/?sort=price&limit=3&cursor={cursor}')
+    assert [p['price'] for p in response.get_json()] == [200]
+
+    response = client.get('/api/v1/places/?sort=-price&max_price=150')
+    assert [p['price'] for p in response.get_json()] == [150, 100, 50]
+
+
+def test_invalid_price_parameters(client):
+    assert client.get('/api/v1/places/?min_price=cheap').status_code == 400
+    assert client.get('/api/v1/places/?sort=title').status_code == 400
+
+
+def test_nearby_places_within_radius(client, make_place):
+    make_place(title="Notre-Dame", latitude=48.853, longitude=2.3499)
+    make_place(title="Eiffel Tower", latitude=48.8584, longitude=2.2945)
+    make_place(title="Versailles", latitude=48.8049, longitude=2.1204)
+    make_place(title="Lyon", latitude=45.764, longitude=4.8357)
+
+    response = client.get('/api/v1/places/nearby?lat=48.8566&lon=2.3522&radius_km=10')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [p['title'] for p in data] == ["Notre-Dame", "Eiffel Tower"]
+    assert data[0]['distance_km'] < data[1]['distance_km'] <= 10
+    assert 'geo_cell' not in data[0]
+
+
+def test_nearby_places_across_the_antimeridian(client, make_place):
+    make_place(title="West", latitude=-16.5, longitude=179.95)
+    make_place(title="East", latitude=-16.5, longitude=-179.95)
+
+    response = client.get('/api/v1/places/nearby?lat=-16.5&lon=179.99&radius_km=20')
+    assert sorted(p['title'] for p in response.get_json()) == ["East", "West"]
+
+
+def test_nearby_follows_updated_coordinates(client, make_place):
+    from app.services import facade
+    place = make_place(title="Moving", latitude=10, longitude=10)
+    facade.update_place(place.id, {'latitude': 20.0, 'longitude': 20.0})
+
+    assert client.get('/api/v1/places/nearby?lat=10&lon=10&radius_km=5').get_json() == []
+    assert len(client.get('/api/v1/places/nearby?lat=20&lon=20&radius_km=5').get_json()) == 1
+
+
+def test_invalid_nearby_parameters(client):
+    assert client.get('/api/v1/places/nearby?lat=48').status_code == 400
+    assert client.get('/api/v1/places/nearby?lat=120&lon=2').status_code == 400
+    assert client.get('/api/v1/places/nearby?lat=48&lon=2&radius_km=-1').status_code == 400
+    assert client.get('/api/v1/places/nearby?lat=48&lon=2&radius_km=100000').status_code == 400
+
+
+def _amenity_ids(*names):
+    from app.models.amenity import Amenity
+    return [Amenity.query.filter_by(name=name).one().id for name in names]
+
+
+def _with_amenities(place, *names):
+    from app.extensions import db
+    from app.models.amenity import Amenity
+    place.amenities = [Amenity.query.filter_by(name=name).one() for name in names]
+    db.session.commit()
+    return place
+
+
+def test_places_filtered_by_amenities(client, make_place):
+    wifi, pool = _amenity_ids("WiFi", "Swimming Pool")
+    both = _with_amenities(make_place(title="Both"), "WiFi", "Swimming Pool")
+    only_wifi = _with_amenities(make_place(title="WiFi only"), "WiFi")
+    _with_amenities(make_place(title="Nothing"))
+
+    response = client.get(f'/api/v1/places/?amenities={wifi},{pool}')
+    assert [p['id'] for p in response.get_json()] == [both.id]
+
+    response = client.get(f'/api/v1/places/?amenities={wifi},{pool}&amenities_match=any')
+    assert [p['id'] for p in response.get_json()] == [both.id, only_wifi.id]
+
+    assert client.get('/api/v1/places/?amenities=unknown').get_json() == []
+    assert client.get(f'/api/v1/places/?amenities={wifi}&amenities_match=some').status_code == 400
+
+
+def test_amenity_filter_is_paginated_and_combined_with_price(client, make_place):
+    wifi, = _amenity_ids("WiFi")
+    ids = [_with_amenities(make_place(title=f"Place {i}", price=10 * i), "WiFi").id for i in range(6)]
+    make_place(title="No WiFi")
+
+    response = client.get(f'/api/v1/places/?amenities={wifi}&limit=4')
+    assert [p['id'] for p in response.get_json()] == ids[:4]
+    cursor = response.headers['X-Next-Cursor']
+    response = client.get(f'/api/v1/places/?amenities={wifi}&limit=4&cursor={cursor}')
+    assert [p['id'] for p in response.get_json()] == ids[4:]
+
+    response = client.get(f'/api/v1/places/?amenities={wifi}&min_price=20&sort=-price')
+    assert [p['id'] for p in response.get_json()] == ids[:1:-1]
+
+
+def _all_pages(client, url):
+    ids, cursor = [], ''
+    while cursor is not None:
+        response = client.get(f'{url}&cursor={cursor}' if cursor else url)
+        ids += [p['id'] for p in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+    return ids
+
+
+def test_amenity_filter_binds_a_bounded_number_of_ids(app, client, make_place, monkeypatch):
+    from sqlalchemy import event
+    from app.extensions import db
+    from app.persistence.place_repository import PlaceRepository
+    monkeypatch.setattr(PlaceRepository, 'AMENITY_BATCH', 2)
+    wifi, pool = _amenity_ids("WiFi", "Swimming Pool")
+    places = [make_place(title=f"Place {i}", price=10 * (7 - i)) for i in range(7)]
+    names = [("Swimming Pool",), ("WiFi",), ("WiFi", "Swimming Pool")]
+    for i, place in enumerate(places):
+        _with_amenities(place, *names[i % 3])
+    with_wifi = [place.id for i, place in enumerate(places) if i % 3]
+    with_both = [place.id for i, place in enumerate(places) if i % 3 == 2]
+
+    parameters = []
+    with app.app_context():
+        engine = db.engine
+    listener = lambda conn, cursor, statement, params, context, many: parameters.append(len(params))
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        for sort, order in (('created_at', 1), ('price', -1), ('-price', 1)):
+            url = f'/api/v1/places/?limit=2&sort={sort}&amenities={wifi}'
+            assert _all_pages(client, url) == with_wifi[::order]
+            assert _all_pages(client, f'{url},{pool}') == with_both[::order]
+            assert _all_pages(client, f'{url},{pool}&amenities_match=any') == [place.id for place in places][::order]
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    assert max(parameters) < len(places)
+
+
+def test_amenity_filter_pages_places_committed_out_of_order(client, owner):
+    from app.extensions import db
+    from app.models.amenity import Amenity
+    from app.models.place import Place
+    wifi = Amenity.query.filter_by(name="WiFi").one()
+    a, b, c = [Place(title=title, price=100, latitude=48.85, longitude=2.35, owner=owner) for title in "ABC"]
+    for place in (b, a, c):
+        place.amenities.append(wifi)
+        db.session.add(place)
+        db.session.commit()
+    url = f'/api/v1/places/?limit=1&amenities={wifi.id}'
+    assert _all_pages(client, url) == [a.id, b.id, c.id]
+
+    # A cursor on a deleted place still resumes after it
+    cursor = client.get(f'/api/v1/places/?limit=2&amenities={wifi.id}').headers['X-Next-Cursor']
+    db.session.delete(b)
+    db.session.commit()
+    assert _all_pages(client, f'{url}&cursor={cursor}') == [c.id]
+
+
+def test_amenity_index_follows_writes(app, client, make_place):
+    from app.extensions import db
+    from app.services import facade
+    wifi, pool = _amenity_ids("WiFi", "Swimming Pool")
+    place = _with_amenities(make_place(), "WiFi")
+
+    facade.add_place_amenities(place.id, [pool])
+    assert [p['id'] for p in client.get(f'/api/v1/places/?amenities={wifi},{pool}').get_json()] == [place.id]
+
+    _with_amenities(place, "Swimming Pool")
+    assert client.get(f'/api/v1/places/?amenities={wifi}').get_json() == []
+
+    place.amenities.append(facade.get_amenity(wifi))
+    db.session.flush()
+    db.session.rollback()
+    assert client.get(f'/api/v1/places/?amenities={wifi}').get_json() == []
+
+    facade.place_repo.amenity_index.clear()
+    facade.load_indexes()
+    assert [p['id'] for p in client.get(f'/api/v1/places/?amenities={pool}').get_json()] == [place.id]
+
+    db.session.delete(place)
+    db.session.commit()
+    assert client.get(f'/api/v1/places/?amenities={pool}').get_json() == []
+
+
+def test_full_text_search_ranks_title_matches_first(client, make_place):
+    in_description = make_place(title="Loft", description="Quiet loft near the beach")
+    in_title = make_place(title="Beach House", description="Sea view")
+    make_place(title="Chalet", description="Mountain view")
+
+    response = client.get('/api/v1/places/search?q=beach')
+    assert response.status_code == 200
+    assert [p['id'] for p in response.get_json()] == [in_title.id, in_description.id]
+
+    response = client.get('/api/v1/places/search?q=mount')
+    assert [p['title'] for p in response.get_json()] == ["Chalet"]
+
+
+def test_full_text_search_is_paginated(client, make_place):
+    ids = {make_place(title=f"Studio {i}", description="studio").id for i in range(5)}
+
+    seen = []
+    cursor = None
+    while True:
+        response = client.get('/api/v1/places/search?q=studio&limit=2' + (f'&cursor={cursor}' if cursor else ''))
+        seen += [p['id'] for p in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert len(seen) == 5 and set(seen) == ids
+
+
+def test_full_text_index_follows_writes(client, make_place):
+    from app.extensions import db
+    from app.services import facade
+    place = make_place(title="Cabin", description="wooden")
+
+    facade.update_place(place.id, {'description': 'stone'})
+    assert client.get('/api/v1/places/search?q=wooden').get_json() == []
+    assert len(client.get('/api/v1/places/search?q=stone').get_json()) == 1
+
+    db.session.delete(place)
+    db.session.commit()
+    assert client.get('/api/v1/places/search?q=cabin').get_json() == []
+
+
+def test_full_text_search_survives_renumbered_rowids(client, make_place):
+    from sqlalchemy import text
+    from app.extensions import db
+    beach = make_place(title="Beach House")
+    make_place(title="Chalet")
+    # What VACUUM may do to the implicit rowid of a table with a string key
+    db.session.execute(text("UPDATE places SET rowid = rowid + 1000"))
+    db.session.execute(text("UPDATE places SET rowid = rowid - 999"))
+    db.session.commit()
+    assert [p['id'] for p in client.get('/api/v1/places/search?q=beach').get_json()] == [beach.id]
+
+
+def test_invalid_search_parameters(client):
+    assert client.get('/api/v1/places/search').status_code == 400
+    assert client.get('/api/v1/places/search?q=%22%2A').status_code == 400
+
+
+def test_suggest_titles_by_prefix(client, make_place):
+    from app.services import facade
+    for title in ("Beach House", "Béarn Farm", "beach hut", "Loft"):
+        make_place(title=title)
+    facade.load_indexes()
+
+    response = client.get('/api/v1/places/suggest?prefix=BEA')
+    assert response.status_code == 200
+    assert [p['title'] for p in response.get_json()] == ["Beach House", "beach hut", "Béarn Farm"]
+    assert [p['title'] for p in client.get('/api/v1/places/suggest?prefix=beach&limit=1').get_json()] == ["Beach House"]
+    assert client.get('/api/v1/places/suggest?prefix=zz').get_json() == []
+
+
+def test_suggest_follows_facade_writes(client, owner):
+    from app.services import facade
+    place = facade.create_place({'title': "Cabin", 'price': 80, 'latitude': 1.0, 'longitude': 1.0,
+                                 'owner_id': owner.id})
+    assert [p['id'] for p in client.get('/api/v1/places/suggest?prefix=cab').get_json()] == [place.id]
+
+    facade.update_place(place.id, {'title': "Chalet"})
+    assert client.get('/api/v1/places/suggest?prefix=cab').get_json() == []
+    assert [p['title'] for p in client.get('/api/v1/places/suggest?prefix=cha').get_json()] == ["Chalet"]
+
+
+def test_invalid_suggest_parameters(client):
+    assert client.get('/api/v1/places/suggest').status_code == 400
+    assert client.get('/api/v1/places/suggest?prefix=a&limit=x').status_code == 400
+
+
+def _facets(client):
+    data = client.get('/api/v1/places/facets').get_json()
+    return (
+        {bucket['min']: bucket['count'] for bucket in data['price'] if bucket['count']},
+        {amenity['name']: amenity['count'] for amenity in data['amenities'] if amenity['count']},
+        {band: count for band, count in data['rating'].items() if count},
+    )
+
+
+def test_facets_follow_place_and_review_writes(app, client, make_place):
+    from app.extensions import db
+    from app.models.review import Review
+    from app.models.user import User
+    from app.services import facade
+    cheap = _with_amenities(make_place(price=40), "WiFi")
+    expensive = _with_amenities(make_place(price=250), "WiFi", "Swimming Pool")
+    assert _facets(client) == ({25: 1, 200: 1}, {"WiFi": 2, "Swimming Pool": 1}, {'unrated': 2})
+
+    guest = User(first_name="Bob", last_name="Jones", email="bob@example.com", password="secret")
+    db.session.add_all([Review(text="Great", rating=5, place=cheap, user=guest),
+                        Review(text="Good", rating=4, place=cheap, user=guest)])
+    db.session.commit()
+    assert _facets(client)[2] == {'unrated': 1, '4': 1}
+
+    facade.update_place(cheap.id, {'price': 120.0})
+    _with_amenities(expensive, "Air Conditioning")
+    assert _facets(client)[:2] == ({100: 1, 200: 1}, {"WiFi": 1, "Air Conditioning": 1})
+
+    db.session.delete(cheap)
+    db.session.commit()
+    assert _facets(client) == ({200: 1}, {"Air Conditioning": 1}, {'unrated': 1})
+
+    expensive.price = 10.0
+    db.session.flush()
+    db.session.rollback()
+    assert _facets(client)[0] == {200: 1}
+
+
+def test_facets_rebuild(app, client, make_place):
+    from app.extensions import db
+    from app.models.facet import FacetCount
+    make_place(price=60)
+    db.session.query(FacetCount).delete()
+    db.session.commit()
+    assert _facets(client) == ({}, {}, {})
+
+    result = app.test_cli_runner().invoke(args=['rebuild-facets'])
+    assert result.exit_code == 0
+    assert _facets(client) == ({50: 1}, {}, {'unrated': 1})
+
+
+def test_places_fetched_by_ids_in_request_order(client, make_place):
+    first, second, third = (make_place(title=title) for title in ("First", "Second", "Third"))
+
+    response = client.get(f'/api/v1/places/?ids={third.id},unknown,{first.id},{third.id}')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [place['title'] for place in data['items']] == ["Third", "First"]
+    assert data['missing'] == ["unknown"]
+
+
+def test_places_fetched_by_ids_with_related_objects(client, owner, make_place):
+    wifi, = _amenity_ids("WiFi")
+    loft = _with_amenities(make_place(title="Loft"), "WiFi")
+    url = f'/api/v1/places/?ids={loft.id},unknown&fields=title&include=owner,amenities'
+
+    data = client.get(url).get_json()
+    assert [(place['title'], place['owner']['first_name'], [a['name'] for a in place['amenities']])
+            for place in data['items']] == [("Loft", "Alice", ["WiFi"])]
+    assert data['missing'] == ["unknown"]
+
+    data = client.get(url + '&normalize=true').get_json()
+    assert [(place['title'], place['owner'], place['amenities']) for place in data['items']] == [
+        ("Loft", owner.id, [wifi])]
+    assert set(data['included']) == {'users', 'amenities'} and data['missing'] == ["unknown"]
+    assert client.get(f'/api/v1/places/?ids={loft.id}&include=reviews').status_code == 400
+
+
+def test_invalid_ids_parameter(app, client):
+    assert client.get('/api/v1/places/?ids=,').status_code == 400
+    too_many = ','.join(str(n) for n in range(app.config['MAX_PAGE_SIZE'] + 1))
+    assert client.get(f'/api/v1/places/?ids={too_many}').status_code == 400
+
+
+def test_place_detail_includes_related_objects(client, make_place, count_queries):
+    from app.extensions import db
+    from app.models.review import Review
+    from app.models.user import User
+    place = _with_amenities(make_place(title="Loft"), "WiFi")
+    guests = [User(first_name=f"Guest{n}", last_name="Doe", email=f"guest{n}@example.com", password="secret")
+              for n in range(3)]
+    db.session.add(Review(text="Nice", rating=4, place=place, user=guests[0]))
+    db.session.commit()
+    url = f'/api/v1/places/{place.id}?include=owner,reviews,amenities'
+
+    response, queries = count_queries(lambda: client.get(url))
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['title'] == "Loft"
+    assert data['owner']['first_name'] == "Alice"
+    assert [amenity['name'] for amenity in data['amenities']] == ["WiFi"]
+    assert [(review['rating'], review['user']['first_name']) for review in data['reviews']] == [(4, "Guest0")]
+
+    db.session.add_all([Review(text="Good", rating=5, place=place, user=guest) for guest in guests[1:]])
+    db.session.commit()
+    response, more_queries = count_queries(lambda: client.get(url))
+    assert len(response.get_json()['reviews']) == 3
+    assert more_queries == queries == 3
+
+
+def test_invalid_include_parameter(client, make_place):
+    place = make_place()
+    assert client.get(f'/api/v1/places/{place.id}?include=owner,bookings').status_code == 400
+    assert client.get('/api/v1/places/unknown?include=owner').status_code == 404
+
+
+def test_place_reviews_are_paginated_latest_first(client, make_place):
+    from datetime import datetime, timedelta
+    from app.extensions import db
+    from app.models.review import Review
+    from app.models.user import User
+    place, other = make_place(), make_place()
+    guest = User(first_name="Bob", last_name="Jones", email="bob@example.com", password="secret")
+    start = datetime(2024, 1, 1)
+    for n in range(5):
+        review = Review(text=f"Review {n}", rating=n + 1, place=place, user=guest)
+        review.created_at = start + timedelta(days=n)
+        db.session.add(review)
+    db.session.add(Review(text="Elsewhere", rating=5, place=other, user=guest))
+    db.session.commit()
+
+    texts, cursor = [], None
+    while True:
+        url = f'/api/v1/places/{place.id}/reviews/?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200
+        texts += [review['text'] for review in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert texts == [f"Review {n}" for n in reversed(range(5))]
+
+    response = client.get(f'/api/v1/places/{place.id}/reviews/?min_rating=4')
+    assert [review['rating'] for review in response.get_json()] == [5, 4]
+    assert client.get(f'/api/v1/places/{place.id}/reviews/?min_rating=high').status_code == 400
+    assert client.get('/api/v1/places/unknown/reviews/').status_code == 404
+
+
+def test_place_serialization_does_not_depend_on_load_state(client, make_place):
+    from datetime import datetime
+    place = make_place(title="Loft", price=80)
+    expected = place.to_dict()
+    assert place.owner.first_name == "Alice"
+    assert place.to_dict() == expected
+    assert 'owner' not in expected and 'geo_cell' not in expected and '_geo_cell' not in expected
+    assert datetime.fromisoformat(expected['created_at']) == place.created_at
+    assert set(place.to_dict(excluded_attr={'description', 'created_at', 'updated_at'})) == {
+        'id', 'title', 'price', 'latitude', 'longitude', 'owner_id'}
+    assert client.get(f'/api/v1/places/{place.id}').get_json() == expected
+
+
+def test_sparse_fieldsets_only_read_requested_columns(app, client, make_place):
+    from sqlalchemy import event
+    from app.extensions import db
+    place_id = make_place(title="Loft", price=80, description="Long text " * 40).id
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        listing = client.get('/api/v1/places/?fields=id,title,price')
+        detail = client.get(f'/api/v1/places/{place_id}?fields=title')
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert listing.get_json() == [{'id': place_id, 'title': "Loft", 'price': 80.0}]
+    assert detail.get_json() == {'title': "Loft"}
+    assert not any('places.description' in statement for statement in statements)
+
+
+def test_invalid_fields_parameter(client, owner, make_place):
+    assert client.get('/api/v1/places/?fields=title,geo_cell').status_code == 400
+    assert client.get('/api/v1/places/?fields=,').status_code == 400
+    assert client.get(f'/api/v1/users/{owner.id}?fields=email,password').status_code == 400
+    assert client.get(f'/api/v1/users/{owner.id}?fields=email').get_json() == {'email': "alice@example.com"}
+
+
+def test_field_order_does_not_multiply_serializers(client, make_place):
+    from app.models.place import Place
+    from app.models.serializer import serializer_for
+    make_place(title="Loft", price=80)
+    plan = serializer_for(Place)._plan
+    responses = [client.get(f'/api/v1/places/?fields={fields}').data
+                 for fields in ('title,price,id', 'price,id,title', 'id,title,price,title')]
+    assert responses[0] == responses[1] == responses[2]
+    columns = [column for column in serializer_for(Place).columns if column in ('id', 'price')]
+    assert list(client.get('/api/v1/places/?fields=price,id').get_json()[0]) == columns
+    assert plan.cache_info().currsize <= plan.cache_info().maxsize
+
+
+def test_listings_read_records_without_the_orm(client, make_place):
+    from app.extensions import db
+    from app.persistence.projection import Projection
+    from app.services import facade
+    place_id = make_place(title="Loft", price=80).id
+    db.session.expunge_all()
+    places, _ = facade.get_places_page(10)
+    assert [type(place) for place in places] == [Projection]
+    assert len(db.session.identity_map) == 0
+    assert places[0].to_dict() == client.get(f'/api/v1/places/{place_id}').get_json()
+    assert [place.to_dict() for place in facade.iter_places()] == client.get('/api/v1/places/').get_json()
+
+
+def test_place_pages_include_related_objects(client, owner, make_place, count_queries):
+    wifi, pool = _amenity_ids("WiFi", "Swimming Pool")
+    _with_amenities(make_place(title="Loft", price=80), "WiFi", "Swimming Pool")
+    _with_amenities(make_place(title="Cabin", price=60), "WiFi")
+    url = '/api/v1/places/?sort=price&include=owner,amenities&fields=title'
+
+    nested, queries = count_queries(lambda: client.get(url))
+    assert nested.status_code == 200 and 'ETag' not in nested.headers
+    owner_document = {'id': owner.id, 'first_name': "Alice", 'last_name': "Smith", 'email': "alice@example.com"}
+    assert [(place['title'], place['owner'], sorted(a['name'] for a in place['amenities']))
+            for place in nested.get_json()] == [("Cabin", owner_document, ["WiFi"]),
+                                                ("Loft", owner_document, ["Swimming Pool", "WiFi"])]
+    assert queries == 4
+
+    normalized = client.get(url + '&normalize=true').get_json()
+    assert [(place['title'], place['owner'], sorted(place['amenities'])) for place in normalized['data']] == [
+        ("Cabin", owner.id, [wifi]), ("Loft", owner.id, sorted([wifi, pool]))]
+    assert normalized['included'] == {
+        'users': {owner.id: owner_document},
+        'amenities': {wifi: {'id': wifi, 'name': "WiFi"}, pool: {'id': pool, 'name': "Swimming Pool"}},
+    }
+    assert client.get('/api/v1/places/?include=reviews').status_code == 400
+    search = client.get('/api/v1/places/search?q=loft&include=owner&normalize=true').get_json()
+    assert [place['owner'] for place in search['data']] == [owner.id]
+
+
+def _bulk(client, body, email="alice@example.com", password="secret"):
+    token = client.post('/api/v1/auth/login', json={'email': email, 'password': password}).get_json()['access_token']
+    return client.post('/api/v1/places/bulk', data=body, content_type='application/x-ndjson',
+                       headers={'Authorization': f'Bearer {token}'})
+
+
+def test_bulk_create_places(app, client, owner):
+    import json
+    from sqlalchemy import event
+    from app.extensions import db
+    app.config['BULK_BATCH_SIZE'] = 2
+    wifi, = _amenity_ids("WiFi")
+    rows = [{'title': f"Flat {n}", 'price': 30 + n, 'latitude': 48.85, 'longitude': 2.35} for n in range(4)]
+    rows[0]['amenities'] = [wifi]
+    inserts = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: inserts.append(
+        executemany) if statement.startswith('INSERT INTO places ') else None
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        response = _bulk(client, '\n'.join(json.dumps(row) for row in rows) + '\n\n')
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert response.status_code == 201
+    assert response.get_json() == {'created': 4}
+    assert inserts == [True, True]
+
+    places = client.get('/api/v1/places/?sort=price').get_json()
+    assert [place['title'] for place in places] == ["Flat 0", "Flat 1", "Flat 2", "Flat 3"]
+    assert all(place['owner_id'] == owner.id and place['description'] == "" for place in places)
+    assert [place['title'] for place in client.get('/api/v1/places/?amenities=' + wifi).get_json()] == ["Flat 0"]
+    assert len(client.get('/api/v1/places/search?q=flat').get_json()) == 4
+    assert len(client.get('/api/v1/places/suggest?prefix=flat').get_json()) == 4
+    assert _facets(client)[:2] == ({25: 4}, {"WiFi": 1})
+
+
+def test_bulk_create_is_all_or_nothing(app, client, owner):
+    valid = '{"title": "Flat", "price": 30, "latitude": 1, "longitude": 1}'
+    body = '\n'.join([valid, 'not json', '{"title": "Flat", "price": -1, "latitude": 1, "longitude": 1}',
+                      '{"title": "Flat", "owner_id": "someone", "price": 1, "latitude": 1, "longitude": 1}',
+                      '{"title": "Flat", "price": 1, "latitude": 1, "longitude": 1, "amenities": ["nope"]}', valid])
+    response = _bulk(client, body)
+    assert response.status_code == 400
+    assert [error['line'] for error in response.get_json()['errors']] == [2, 3, 4, 5]
+    assert client.get('/api/v1/places/').get_json() == []
+    assert client.get('/api/v1/places/suggest?prefix=flat').get_json() == []
+
+    app.config['BULK_MAX_ROWS'] = 1
+    assert _bulk(client, '\n'.join([valid, valid])).get_json()['errors'][0]['line'] == 2
+    token = client.post('/api/v1/auth/login', json={'email': "alice@example.com", 'password': "secret"}).get_json()
+    assert client.post('/api/v1/places/bulk', json=[], headers={
+        'Authorization': f"Bearer {token['access_token']}"}).status_code == 415
+
+
+def test_upsert_many(app, owner):
+    from app.persistence.repository import BulkError
+    from app.services import facade
+    users = facade.user_repo
+    rows = [{'first_name': "Bob", 'last_name': "Jones", 'email': "bob@example.com", 'password': "pw"},
+            {'first_name': "Alicia", 'last_name': "Smith", 'email': "alice@example.com", 'password': "pw"}]
+    assert users.upsert_many(rows, conflict_keys=('email',), batch_size=1) == (1, 1)
+    assert owner.first_name == "Alicia" and owner.verify_password("pw")
+    assert facade.get_user_by_email("bob@example.com").verify_password("pw")
+
+    with pytest.raises(BulkError) as error:
+        users.upsert_many([{**rows[0], 'first_name': "Robert"}, {'email': "carol@example.com"}], ('email',))
+    assert error.value.errors[0][0] == 1
+    assert facade.get_user_by_email("bob@example.com").first_name == "Bob"
+    assert facade.get_user_by_email("carol@example.com") is None
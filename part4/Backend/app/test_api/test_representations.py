@@ -0,0 +1,114 @@
+import pytest
+
+from app.api.representations import BACKENDS, get_dumps
+
+
+def test_backends_write_identical_json(client, make_place):
+    pytest.importorskip("orjson")
+    make_place(title="Château près de l'eau", price=99.95, description='Quotes " and \\ backslashes')
+    make_place(title="Loft", price=120)
+    payload = client.get('/api/v1/places/').get_json()
+    payload.append({'rating': {'unrated': 2, '5': 0}, 'max': None, 'flag': True, 'nested': [[], {}]})
+    assert BACKENDS['orjson'](payload) == BACKENDS['stdlib'](payload)
+
+
+def test_responses_use_the_configured_backend(client, make_place):
+    make_place(title="Château")
+    response = client.get('/api/v1/places/')
+    assert response.mimetype == 'application/json'
+    assert response.data == get_dumps()(response.get_json())
+    assert "Château".encode('utf-8') in response.data
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_dumps('simplejson')
+
+
+def _place_titles(client, make_place):
+    titles = [f"Place {n}" for n in range(3)]
+    for title in titles:
+        make_place(title=title)
+    return titles
+
+
+def test_places_streamed_as_ndjson(client, make_place):
+    import json
+    titles = _place_titles(client, make_place)
+    response = client.get('/api/v1/places/', headers={'Accept': 'application/x-ndjson'})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    lines = response.data.decode('utf-8').splitlines()
+    assert [json.loads(line)['title'] for line in lines] == titles
+
+
+def test_places_streamed_as_json_array(client, make_place, monkeypatch):
+    from app.api import representations
+    monkeypatch.setattr(representations, 'STREAM_CHUNK', 2)
+    titles = _place_titles(client, make_place)
+    response = client.get('/api/v1/places/?stream=true')
+    assert response.mimetype == 'application/json'
+    assert [place['title'] for place in response.get_json()] == titles
+
+    response = client.get('/api/v1/reviews/?stream=true')
+    assert response.get_json() == []
+
+
+def test_streamed_users_leave_out_passwords(client, owner):
+    response = client.get('/api/v1/users/', headers={'Accept': 'application/x-ndjson'})
+    assert b'alice@example.com' in response.data and b'password' not in response.data
+
+
+def test_user_details_leave_out_passwords(client, owner):
+    response = client.get(f'/api/v1/users/{owner.id}')
+    assert response.get_json()['email'] == "alice@example.com" and 'password' not in response.get_json()
+    for headers in ({}, {'Accept': 'application/msgpack'}):
+        response = client.get('/api/v1/users/', headers=headers)
+        assert b'alice@example.com' in response.data and b'password' not in response.data
+
+
+def test_responses_negotiated_as_msgpack(client, make_place):
+    msgpack = pytest.importorskip("msgpack")
+    place = make_place(title="Château", price=99.5)
+    for url in ('/api/v1/places/', f'/api/v1/places/{place.id}?include=owner', '/api/v1/places/unknown'):
+        response = client.get(url, headers={'Accept': 'application/msgpack'})
+        assert response.mimetype == 'application/msgpack'
+        assert msgpack.unpackb(response.data) == client.get(url).get_json()
+    assert client.get('/api/v1/places/', headers={'Accept': '*/*'}).mimetype == 'application/json'
+
+
+def test_msgpack_request_payloads(app, client):
+    msgpack = pytest.importorskip("msgpack")
+    credentials = {'email': app.config['ADMIN_EMAIL'], 'password': app.config['ADMIN_PASSWORD']}
+    response = client.post('/api/v1/auth/login', data=msgpack.packb(credentials),
+                           content_type='application/msgpack')
+    assert response.status_code == 200 and response.get_json()['access_token']
+    invalid = client.post('/api/v1/auth/login', data=b'\xc1', content_type='application/msgpack')
+    assert invalid.status_code == client.post('/api/v1/auth/login', data=b'{', content_type='application/json').status_code
+
+
+def test_list_responses_reuse_encoded_fragments(app, client, make_place):
+    from app.extensions import db
+    from app.services import facade
+    fragments = app.extensions['json_fragments']
+    places = [make_place(title=f"Place {n}") for n in range(3)]
+    fragments.clear()
+    first = client.get('/api/v1/places/')
+    assert fragments.stats()['misses'] == 3 and fragments.stats()['hits'] == 0
+    assert client.get('/api/v1/places/').data == first.data
+    assert fragments.stats()['hits'] == 3
+
+    places[0].update({'title': "Renamed"})
+    db.session.delete(places[1])
+    db.session.commit()
+    assert fragments.stats()['entries'] == 1
+    titles = [place['title'] for place in client.get('/api/v1/places/').get_json()]
+    assert sorted(titles) == ["Place 2", "Renamed"]
+    assert client.get('/api/v1/places/?fields=id,title').get_json()[0].keys() == {'id', 'title'}
+    assert fragments.stats()['hits'] == 4
+
+    place = facade.get_places_page(1)[0][0]
+    encoded = fragments.encode(place, ['password'], only=('title', 'id'))
+    assert fragments.encode(place, ('password',), only=['id', 'title', 'id']) == encoded
+    assert fragments.stats()['hits'] == 5
@@ -0,0 +1,139 @@
+from sqlalchemy import text
+
+from app import create_app
+from app.extensions import db
+from config import ProductionConfig
+
+
+def _pragma(name):
+    return db.session.execute(text(f'PRAGMA {name}')).scalar()
+
+
+def test_production_pragmas_are_set_on_connect(tmp_path):
+    class Config(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'hbnb.db'}"
+
+    app = create_app(Config)
+    with app.app_context():
+        assert _pragma('journal_mode') == 'wal'
+        assert _pragma('synchronous') == 1
+        assert _pragma('mmap_size') == 256 * 1024 * 1024
+        assert _pragma('cache_size') == -64 * 1024
+        assert _pragma('busy_timeout') == 5000
+        assert _pragma('temp_store') == 2
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_other_configs_keep_sqlite_defaults(app):
+    assert _pragma('synchronous') == 2
+    assert _pragma('cache_size') == -2000
+
+
+def _query_plan(statement):
+    sql = statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    return ' | '.join(row[3] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')))
+
+
+def test_hot_queries_use_indexes(app):
+    from sqlalchemy import func, select
+    from app.models.amenity import PlaceAmenity
+    from app.models.place import Place
+    from app.models.review import Review
+    plans = {
+        'ix_reviews_user_id_created_at_id': select(Review.id).where(Review.user_id == 'user'),
+        'ix_reviews_place_id_created_at_id': select(Review.id).where(Review.place_id == 'place')
+                                             .order_by(Review.created_at.desc(), Review.id.desc()),
+        'COVERING INDEX ix_reviews_place_id_rating': select(Review.place_id, func.sum(Review.rating), func.count())
+                                                     .where(Review.place_id.in_(['a', 'b'])).group_by(Review.place_id),
+        'ix_places_owner_id_created_at_id': select(Place.id).where(Place.owner_id.in_(['owner'])),
+        'COVERING INDEX ix_place_amenity_amenity_id_place_id': select(PlaceAmenity.place_id)
+                                                               .where(PlaceAmenity.amenity_id == 'amenity'),
+        'ix_places_price_id': select(Place.id).where(Place.price >= 50).order_by(Place.price, Place.id).limit(20),
+    }
+    for index, statement in plans.items():
+        plan = _query_plan(statement)
+        assert index in plan and 'SCAN' not in plan, plan
+
+
+def test_missing_indexes_are_added_to_existing_databases(tmp_path):
+    from sqlalchemy import inspect
+
+    class Config(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'hbnb.db'}"
+
+    app = create_app(Config)
+    dropped = ('ix_places_owner_id_created_at_id', 'ix_reviews_user_id_created_at_id',
+               'ix_place_amenity_amenity_id_place_id')
+    with app.app_context():
+        for index in dropped:
+            db.session.execute(text(f'DROP INDEX {index}'))
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+
+    app = create_app(Config)
+    with app.app_context():
+        inspector = inspect(db.engine)
+        indexes = {index['name'] for table in ('places', 'reviews', 'place_amenity')
+                   for index in inspector.get_indexes(table)}
+        assert set(dropped) <= indexes
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_rowid_keyed_full_text_index_is_replaced(tmp_path):
+    class Config(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'hbnb.db'}"
+
+    app = create_app(Config)
+    with app.app_context():
+        from app.models.place import Place
+        from app.services import facade
+        owner = facade.get_user_by_email(app.config['ADMIN_EMAIL'])
+        db.session.add(Place(title="Beach House", price=90, latitude=1, longitude=1, owner=owner))
+        db.session.commit()
+        # The former layout: places_fts keyed on the rowid of places
+        db.session.execute(text('DROP TABLE places_fts_ids'))
+        db.session.execute(text('DROP TABLE places_fts'))
+        db.session.execute(text('CREATE VIRTUAL TABLE places_fts USING fts5(title, description)'))
+        db.session.execute(text('INSERT INTO places_fts (rowid, title, description) '
+                                'SELECT rowid + 1, title, description FROM places'))
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+
+    app = create_app(Config)
+    with app.app_context():
+        response = app.test_client().get('/api/v1/places/search?q=beach')
+        assert [place['title'] for place in response.get_json()] == ["Beach House"]
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_geo_cells_are_backfilled_without_touching_updated_at(tmp_path, monkeypatch):
+    import app.database
+    monkeypatch.setattr(app.database, 'GEO_CELL_BATCH', 2)
+
+    class Config(ProductionConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'hbnb.db'}"
+
+    flask_app = create_app(Config)
+    with flask_app.app_context():
+        from app.models.place import Place
+        from app.services import facade
+        owner = facade.get_user_by_email(flask_app.config['ADMIN_EMAIL'])
+        db.session.add_all([Place(title=f"Flat {n}", price=90, latitude=48.85 + n / 100, longitude=2.35, owner=owner)
+                            for n in range(5)])
+        db.session.commit()
+        expected = db.session.execute(text('SELECT id, geo_cell, updated_at FROM places ORDER BY id')).all()
+        db.session.execute(text('UPDATE places SET geo_cell = NULL'))
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+
+    flask_app = create_app(Config)
+    with flask_app.app_context():
+        assert db.session.execute(text('SELECT id, geo_cell, updated_at FROM places ORDER BY id')).all() == expected
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.place import Place
+from app.models.review import Review
+from app.persistence.unit_of_work import unit_of_work
+from app.services import facade
+
+
+def _count_commits(action):
+    commits = []
+    listener = lambda session: commits.append(session)
+    event.listen(db.session, "after_commit", listener)
+    try:
+        result = action()
+    finally:
+        event.remove(db.session, "after_commit", listener)
+    return result, len(commits)
+
+
+def _admin_token(app, client):
+    credentials = {'email': app.config['ADMIN_EMAIL'], 'password': app.config['ADMIN_PASSWORD']}
+    return client.post('/api/v1/auth/login', json=credentials).get_json()['access_token']
+
+
+def test_request_commits_once(app, client, make_place):
+    place_id = make_place().id
+    headers = {'Authorization': f'Bearer {_admin_token(app, client)}'}
+    review = {'text': "Great stay", 'rating': 5, 'user_id': "ignored", 'place_id': place_id}
+    response, commits = _count_commits(lambda: client.post('/api/v1/reviews/', json=review, headers=headers))
+    assert response.status_code == 201
+    assert commits == 1
+    assert Review.query.filter_by(place_id=place_id).count() == 1
+
+
+def test_failed_request_rolls_back(app, client, make_place):
+    admin = facade.get_user_by_email(app.config['ADMIN_EMAIL'])
+    place_id = make_place(title="Loft", owner=admin).id
+    headers = {'Authorization': f'Bearer {_admin_token(app, client)}'}
+    response = client.put(f'/api/v1/places/{place_id}', json={'title': "Renamed", 'price': -1}, headers=headers)
+    assert response.status_code == 400
+    db.session.expire_all()
+    assert db.session.get(Place, place_id).title == "Loft"
+
+
+def test_explicit_unit_of_work(owner):
+    with pytest.raises(RuntimeError):
+        with unit_of_work():
+            facade.create_place({'title': "Ghost", 'price': 10, 'latitude': 1, 'longitude': 1,
+                                 'owner_id': owner.id})
+            raise RuntimeError
+    assert Place.query.filter_by(title="Ghost").count() == 0
+    assert facade.suggest_places("Ghost", 5) == []
+
+    def create_two():
+        with unit_of_work():
+            for title in ("First", "Second"):
+                with unit_of_work():
+                    facade.create_place({'title': title, 'price': 10, 'latitude': 1, 'longitude': 1,
+                                         'owner_id': owner.id})
+    _, commits = _count_commits(create_two)
+    assert commits == 1
+    assert [suggestion['title'] for suggestion in facade.suggest_places("", 5) if suggestion['title'] in
+            ("First", "Second")] == ["First", "Second"]
@@ -0,0 +1,77 @@
+"""
+Fixtures shared by the benchmarks: an application on a throwaway SQLite file
+and bulk inserts of generated places.
+"""
+import os
+import random
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, List, Optional
+
+from app import create_app
+from app.extensions import db
+from app.models.place import Place
+from app.services import facade
+from config import TestingConfig
+
+# Rows per executemany of fill_places
+CHUNK = 50000
+WORDS = "cozy bright quiet spacious modern rustic garden terrace view river loft studio villa".split()
+
+
+@contextmanager
+def bench_app(config: type = TestingConfig, **settings) -> Iterator:
+    """
+    Yield an application of `config`, with the overrides `settings`, on a new
+    SQLite file removed on exit.
+    """
+    directory = tempfile.mkdtemp()
+    settings['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    app = create_app(type('BenchConfig', (config,), settings))
+    try:
+        yield app
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def admin_id(app) -> str:
+    """Id of the admin user seeded by create_app, the owner of generated places."""
+    with app.app_context():
+        return facade.get_user_by_email(app.config['ADMIN_EMAIL']).id
+
+
+def words(rng: random.Random, count: int, limit: int = 500) -> str:
+    """`count` random WORDS, cut to `limit` characters."""
+    return " ".join(rng.choice(WORDS) for _ in range(count))[:limit]
+
+
+def random_place(n: int, rng: random.Random) -> dict:
+    """Columns of the n-th generated place: a random price and position."""
+    return {'title': f'Place {n}', 'description': 'A place to stay', 'price': round(rng.uniform(10, 500), 2),
+            'latitude': rng.uniform(-90, 90), 'longitude': rng.uniform(-180, 180)}
+
+
+def fill_places(size: int, owner_id: str, columns: Callable[[int, random.Random], dict] = random_place,
+                seed: Optional[int] = None) -> List[str]:
+    """
+    Insert `size` places of `owner_id`, CHUNK rows per Core executemany, and
+    return their ids. Each gets an id, timestamps (created a second apart,
+    newest first) and `columns(n, rng)`, which may override any of them; `rng`
+    is seeded with `seed`, `size` by default.
+    """
+    rng = random.Random(size if seed is None else seed)
+    now = datetime.now()
+    ids = []
+    for start in range(0, size, CHUNK):
+        rows = [{'id': str(uuid.uuid4()), 'created_at': now - timedelta(seconds=n), 'updated_at': now,
+                 'owner_id': owner_id, **columns(n, rng)} for n in range(start, min(size, start + CHUNK))]
+        db.session.execute(Place.__table__.insert(), rows)
+        ids += [row['id'] for row in rows]
+    db.session.commit()
+    return ids
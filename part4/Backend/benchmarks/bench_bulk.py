@@ -0,0 +1,73 @@
+"""
+Bulk write throughput on SQLite: one object per call against add_many,
+upsert_many and POST /places/bulk.
+
+Usage: python -m benchmarks.bench_bulk [count]   (default: 5000)
+
+On a temporary SQLite file, creates `count` places with facade.create_place,
+one commit each, then with facade.create_places (add_many) and through the
+NDJSON endpoint. Then adds `count` / 2 amenities one at a time, and upserts
+`count` with upsert_many: half of them new, half renaming the existing ones.
+"""
+import json
+import sys
+import time
+
+from app.services import facade
+from benchmarks._common import admin_id, bench_app
+
+
+def _place(n, amenity_id):
+    return {'title': f'Place {n}', 'price': n % 400, 'latitude': (n % 170) - 85, 'longitude': (n % 350) - 175,
+            'amenities': [amenity_id]}
+
+
+def _timed(action, count):
+    start = time.perf_counter()
+    action()
+    return count / (time.perf_counter() - start)
+
+
+def run(count):
+    with bench_app(BULK_MAX_ROWS=count) as app:
+        owner_id = admin_id(app)
+        client = app.test_client()
+        with app.app_context():
+            wifi = facade.get_all_amenities()[0].id
+            amenities = facade.amenity_repo
+            rows = [{'id': f'amenity-{n}', 'name': f'Amenity {n}'} for n in range(count)]
+
+            def one_by_one():
+                for n in range(count):
+                    facade.create_place(dict(_place(n, wifi), owner_id=owner_id))
+
+            def bulk():
+                assert facade.create_places((_place(n, wifi) for n in range(count)), owner_id) == count
+
+            def add_amenities():
+                for row in rows[:count // 2]:
+                    amenities.add(amenities.build(row))
+
+            def upsert_amenities():
+                upserted = [dict(row, name=row['name'] + ' (renamed)') for row in rows]
+                assert amenities.upsert_many(upserted) == (count - count // 2, count // 2)
+
+            print(f'{"create_place, commit each":<28} {_timed(one_by_one, count):9.1f} rows/s')
+            print(f'{"create_places (add_many)":<28} {_timed(bulk, count):9.1f} rows/s')
+            print(f'{"amenity add, commit each":<28} {_timed(add_amenities, count // 2):9.1f} rows/s')
+            print(f'{"amenity upsert_many":<28} {_timed(upsert_amenities, count):9.1f} rows/s')
+
+        credentials = {'email': app.config['ADMIN_EMAIL'], 'password': app.config['ADMIN_PASSWORD']}
+        token = client.post('/api/v1/auth/login', json=credentials).get_json()['access_token']
+        body = '\n'.join(json.dumps(_place(n, wifi)) for n in range(count))
+
+        def endpoint():
+            response = client.post('/api/v1/places/bulk', data=body, content_type='application/x-ndjson',
+                                   headers={'Authorization': f'Bearer {token}'})
+            assert response.status_code == 201, response.get_json()
+
+        print(f'{"POST /places/bulk":<28} {_timed(endpoint, count):9.1f} rows/s')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
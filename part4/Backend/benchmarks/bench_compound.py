@@ -0,0 +1,66 @@
+"""
+Payload size and latency of place pages with their owner and amenities, nested or normalized.
+
+Usage: python -m benchmarks.bench_compound [listings]   (default: 500)
+
+Fills a temporary SQLite database with one owner having `listings` places, each
+with a few of the amenities, then requests pages of 100 places including
+owner and amenities, once with the related objects embedded in every place and
+once as a normalized compound document.
+"""
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from app.extensions import db
+from app.models.amenity import Amenity, PlaceAmenity
+from benchmarks._common import admin_id, bench_app, fill_places, random_place
+
+RUNS = 100
+AMENITIES = 10
+
+
+def _listing(n, rng):
+    return {**random_place(n, rng), 'title': f'Listing {n}'}
+
+
+def _fill(listings, owner_id):
+    rng = random.Random(listings)
+    now = datetime.now()
+    amenities = [{'id': str(uuid.uuid4()), 'created_at': now, 'updated_at': now, 'name': f'Amenity {n}'}
+                 for n in range(AMENITIES)]
+    db.session.execute(Amenity.__table__.insert(), amenities)
+    db.session.execute(PlaceAmenity.__table__.insert(), [
+        {'place_id': place_id, 'amenity_id': amenity['id']}
+        for place_id in fill_places(listings, owner_id, _listing)
+        for amenity in rng.sample(amenities, rng.randint(2, 6))])
+    db.session.commit()
+
+
+def _measure(client, url):
+    size = 0
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        size = len(client.get(url).data)
+    return size, (time.perf_counter() - start) / RUNS * 1000
+
+
+def run(listings):
+    with bench_app() as app:
+        with app.app_context():
+            _fill(listings, admin_id(app))
+        client = app.test_client()
+        print(f'one owner, {listings:,} listings, pages of 100')
+        for query in ('', 'fields=id,title,price&'):
+            for include in ('owner', 'owner,amenities'):
+                url = f'/api/v1/places/?limit=100&{query}include={include}'
+                nested = _measure(client, url)
+                normalized = _measure(client, url + '&normalize=true')
+                print(f'  {query + "include=" + include:<46} nested {nested[0]:>8,} B {nested[1]:6.2f} ms   '
+                      f'normalized {normalized[0]:>8,} B {normalized[1]:6.2f} ms')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,95 @@
+"""
+CPU cost against bytes saved when compressing the list endpoints.
+
+Usage: python -m benchmarks.bench_compression [size]   (default: 100000)
+
+Fills a temporary SQLite database with places having a full description and
+reviews, fetches the uncompressed bodies of the list endpoints, then reports
+for each gzip level (and brotli quality, if installed) the compressed size,
+the ratio and the CPU time spent compressing. Finally, times the requests end
+to end through the middleware with the configured defaults.
+"""
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app.api import compression
+from app.extensions import db
+from app.models.review import Review
+from benchmarks._common import admin_id, bench_app, fill_places, random_place, words
+
+RUNS = 20
+ENDPOINTS = ('/api/v1/places/', '/api/v1/places/?limit=100', '/api/v1/places/?limit=100&fields=id,title,price',
+             '/api/v1/places/{place_id}/reviews/?limit=100', '/api/v1/places/?stream=true')
+
+
+def _place(n, rng):
+    return {**random_place(n, rng), 'title': words(rng, 3), 'description': words(rng, 100)}
+
+
+def _fill(size, owner_id):
+    """Add `size` places and 200 reviews of the first one; return its id."""
+    place_id = fill_places(size, owner_id, _place)[0]
+    rng = random.Random(size)
+    now = datetime.now()
+    db.session.execute(Review.__table__.insert(), [{
+        'id': str(uuid.uuid4()), 'created_at': now - timedelta(seconds=n), 'updated_at': now,
+        'text': words(rng, 30), 'rating': rng.randint(1, 5), 'place_id': place_id, 'user_id': owner_id,
+    } for n in range(200)])
+    db.session.commit()
+    return place_id
+
+
+def _cpu_ms(compress, data, runs):
+    start = time.process_time()
+    for _ in range(runs):
+        compressed = compress(data)
+    return compressed, (time.process_time() - start) / runs * 1000
+
+
+def _codecs():
+    codecs = [(f'gzip {level}', lambda data, level=level: compression.gzip_compress(data, level))
+              for level in (1, 6, 9)]
+    if compression.brotli is not None:
+        codecs += [(f'br {quality}', lambda data, quality=quality: compression.brotli.compress(data, quality=quality))
+                   for quality in (1, 4, 11)]
+    return codecs
+
+
+def _latency_ms(client, url, headers, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        size = len(client.get(url, headers=headers).data)
+    return size, (time.perf_counter() - start) / runs * 1000
+
+
+def run(size):
+    with bench_app() as app:
+        with app.app_context():
+            place_id = _fill(size, admin_id(app))
+        client = app.test_client()
+        print(f'{size:,} places')
+        for endpoint in ENDPOINTS:
+            url = endpoint.format(place_id=place_id)
+            data = client.get(url).data
+            runs = 1 if len(data) > 10 ** 7 else RUNS
+            print(f'{url}  {len(data):,} B')
+            for name, compress in _codecs():
+                compressed, cpu = _cpu_ms(compress, data, runs)
+                print(f'  {name:<8} {len(compressed):>12,} B  x{len(data) / len(compressed):5.1f}  {cpu:9.2f} ms CPU')
+
+        print(f'end to end, defaults: min size {app.config["COMPRESS_MIN_SIZE"]} B, '
+              f'gzip {app.config["COMPRESS_LEVEL"]}, streams {app.config["COMPRESS_STREAM_LEVEL"]}, brotli {app.config["COMPRESS_BROTLI_QUALITY"]}')
+        for endpoint in ENDPOINTS:
+            url = endpoint.format(place_id=place_id)
+            runs = 1 if 'stream' in url else RUNS
+            identity = _latency_ms(client, url, {}, runs)
+            gzip = _latency_ms(client, url, {'Accept-Encoding': 'gzip'}, runs)
+            print(f'  {url:<48} identity {identity[0]:>12,} B {identity[1]:9.2f} ms   '
+                  f'gzip {gzip[0]:>11,} B {gzip[1]:9.2f} ms')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
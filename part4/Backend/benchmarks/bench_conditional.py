@@ -0,0 +1,48 @@
+"""
+Latency of a GET /api/v1/places/ answered in full and revalidated with a 304.
+
+Usage: python -m benchmarks.bench_conditional [size]   (default: 100000)
+
+Fills a temporary SQLite database with places, then requests listings and
+their ETag, and times the same requests sent again with If-None-Match, which
+only run the max(updated_at)/count probe.
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks._common import admin_id, bench_app, fill_places, random_place
+
+RUNS = 200
+
+
+def _place(n, rng):
+    """A random place, last updated up to a few days ago."""
+    return {**random_place(n, rng), 'updated_at': datetime.now() - timedelta(seconds=rng.randrange(10 ** 5))}
+
+
+def _measure(client, url, headers=None):
+    status = None
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        status = client.get(url, headers=headers).status_code
+    return status, (time.perf_counter() - start) / RUNS * 1000
+
+
+def run(size):
+    with bench_app() as app:
+        with app.app_context():
+            fill_places(size, admin_id(app), _place)
+        client = app.test_client()
+        print(f'{size:,} places')
+        for query in ('', 'limit=100', 'max_price=100&limit=100'):
+            url = f'/api/v1/places/?{query}'
+            etag = client.get(url).headers['ETag']
+            full = _measure(client, url)
+            revalidated = _measure(client, url, {'If-None-Match': etag})
+            assert (full[0], revalidated[0]) == (200, 304)
+            print(f'  {query or "first page":<24} 200 {full[1]:7.2f} ms   304 {revalidated[1]:7.2f} ms')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,45 @@
+"""
+Bytes on the wire and latency of the index page listing, with and without ?fields.
+
+Usage: python -m benchmarks.bench_fields [size]   (default: 100000)
+
+Fills a temporary SQLite database with places having a full description, then
+requests pages of GET /api/v1/places/ the way index.html does, with all the
+columns and with fields=id,title,price, and reports the average body size and
+response time.
+"""
+import sys
+import time
+
+from benchmarks._common import admin_id, bench_app, fill_places, random_place, words
+
+RUNS = 200
+
+
+def _place(n, rng):
+    return {**random_place(n, rng), 'title': words(rng, 3), 'description': words(rng, 100)}
+
+
+def _measure(client, url):
+    size = 0
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        size = len(client.get(url).data)
+    return size, (time.perf_counter() - start) / RUNS * 1000
+
+
+def run(size):
+    with bench_app() as app:
+        with app.app_context():
+            fill_places(size, admin_id(app), _place)
+        client = app.test_client()
+        print(f'{size:,} places')
+        for query in ('', 'max_price=100', 'limit=100'):
+            full = _measure(client, f'/api/v1/places/?{query}')
+            sparse = _measure(client, f'/api/v1/places/?fields=id,title,price&{query}')
+            print(f'  {query or "first page":<14} all columns {full[0]:>7,} B {full[1]:7.2f} ms   '
+                  f'id,title,price {sparse[0]:>7,} B {sparse[1]:7.2f} ms')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
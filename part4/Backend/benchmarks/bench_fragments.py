@@ -0,0 +1,77 @@
+"""
+Hit rate and CPU saved by the JSON fragment cache under a read-heavy replay.
+
+Usage: python -m benchmarks.bench_fragments [size] [requests]   (default: 20000 2000)
+
+Fills a temporary SQLite database with places, then replays the same random
+mix of listing requests (popular pages weighted heavier, a write for every
+twenty reads) against an app with the fragment cache and one without, and
+reports the CPU time spent per request and the hit rate of the cache. Both
+apps run twice, alternately, to show the noise. Then times the encoding alone
+of a page of 100 records, directly and from a warm cache.
+"""
+import random
+import sys
+import time
+
+from app.extensions import db
+from app.models.place import Place
+from app.services import facade
+from benchmarks._common import admin_id, bench_app, fill_places
+from benchmarks.bench_fields import _place
+
+URLS = ['/api/v1/places/', '/api/v1/places/?limit=100', '/api/v1/places/?sort=price&limit=100',
+        '/api/v1/places/?sort=-price&limit=100', '/api/v1/places/?max_price=100&limit=100',
+        '/api/v1/places/?min_price=400&limit=50', '/api/v1/amenities/']
+# Share of the requests going to each URL, the first being the most popular
+WEIGHTS = [1 / (rank + 1) for rank in range(len(URLS))]
+WRITE_EVERY = 20
+
+
+def _replay(app, client, requests):
+    rng = random.Random(requests)
+    urls = rng.choices(URLS, WEIGHTS, k=requests)
+    with app.app_context():
+        popular = [place_id for (place_id,) in db.session.execute(
+            db.select(Place.id).order_by(Place.price).limit(200))]
+    start = time.process_time()
+    for n, url in enumerate(urls):
+        if n % WRITE_EVERY == WRITE_EVERY - 1:
+            with app.app_context():
+                facade.update_place(rng.choice(popular), {'price': round(rng.uniform(10, 100), 2)})
+        assert client.get(url).status_code == 200
+    return (time.process_time() - start) / requests * 1000
+
+
+def _encoding_us(app, runs=1000):
+    with app.app_context():
+        records = facade.place_repo.query().limit(100).all()
+        dumps, fragments = app.extensions['json_dumps'], app.extensions['json_fragments']
+        fragments.encode_list(records)
+        timings = []
+        for encode in (lambda: dumps([record.to_dict() for record in records]),
+                       lambda: fragments.encode_list(records)):
+            start = time.process_time()
+            for _ in range(runs):
+                encode()
+            timings.append((time.process_time() - start) / runs * 1e6)
+    return timings
+
+
+def run(size, requests):
+    for cache_size in (10000, 0, 10000, 0):
+        with bench_app(FRAGMENT_CACHE_SIZE=cache_size) as app:
+            with app.app_context():
+                fill_places(size, admin_id(app), _place)
+            cpu_ms = _replay(app, app.test_client(), requests)
+            stats = app.extensions['json_fragments'].stats()
+            label = f'cache of {cache_size:,}' if cache_size else 'no cache'
+            print(f'{size:,} places, {requests:,} requests, {label:<15} {cpu_ms:6.2f} ms CPU/request   '
+                  f'hit rate {stats["hit_rate"]:6.1%}   entries {stats["entries"]:,}')
+            if cache_size:
+                direct, cached = _encoding_us(app)
+    print(f'encoding 100 records: to_dict + dumps {direct:6.0f} us   cached fragments {cached:6.0f} us')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000, int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
@@ -0,0 +1,119 @@
+"""
+Latency of the hot lookup paths without and with the secondary indexes.
+
+Usage: python -m benchmarks.bench_indexes [places]   (default: 50000)
+
+Fills a temporary SQLite database with `places` places of 1,000 owners, three
+reviews and a few amenities each, then times the reviews of a user, the places
+of an owner, the places having an amenity and the rating sums of the facets.
+It runs them with the ix_places_owner_id_*, ix_reviews_user_id_*,
+ix_reviews_place_id_rating and ix_place_amenity_amenity_id_* indexes dropped,
+then created again the way init_db migrates an existing database. It also times
+inserting reviews, which now maintain two more indexes.
+"""
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func, select, text
+
+from app.database import init_db
+from app.extensions import db
+from app.geo import cell_of
+from app.models.amenity import Amenity, PlaceAmenity
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from benchmarks._common import bench_app, fill_places
+
+RUNS = 50
+OWNERS = 1000
+AMENITIES = 10
+NEW_INDEXES = ('ix_places_owner_id_created_at_id', 'ix_reviews_user_id_created_at_id',
+               'ix_reviews_place_id_rating', 'ix_place_amenity_amenity_id_place_id')
+
+
+def _fill(places):
+    rng = random.Random(places)
+    now = datetime.now()
+    stamps = {'created_at': now, 'updated_at': now}
+    users = [{'id': str(uuid.uuid4()), 'first_name': 'User', 'last_name': str(n), 'email': f'user{n}@example.com',
+              'password': 'x', 'is_admin': False, **stamps} for n in range(OWNERS)]
+    amenities = [{'id': str(uuid.uuid4()), 'name': f'Amenity {n}', **stamps} for n in range(AMENITIES)]
+    db.session.execute(User.__table__.insert(), users)
+    db.session.execute(Amenity.__table__.insert(), amenities)
+
+    def listing(n, rng):
+        return {'title': f'Listing {n}', 'description': '', 'price': n % 500, 'latitude': 0, 'longitude': 0,
+                'geo_cell': cell_of(0, 0), 'owner_id': rng.choice(users)['id'], **stamps}
+
+    place_ids = fill_places(places, users[0]['id'], listing)
+    db.session.execute(PlaceAmenity.__table__.insert(), [
+        {'place_id': place_id, 'amenity_id': amenity['id']}
+        for place_id in place_ids for amenity in rng.sample(amenities, rng.randint(1, 4))])
+    db.session.execute(Review.__table__.insert(), [
+        {'id': str(uuid.uuid4()), 'text': 'Nice', 'rating': rng.randint(1, 5), 'place_id': place_id,
+         'user_id': rng.choice(users)['id'], **stamps} for place_id in place_ids for _ in range(3)])
+    db.session.commit()
+    # Count the facets now, so that init_db below only creates the indexes
+    init_db()
+    return [user['id'] for user in users], [amenity['id'] for amenity in amenities], place_ids
+
+
+def _timed(statements):
+    start = time.perf_counter()
+    for statement in statements:
+        db.session.execute(statement).all()
+    return (time.perf_counter() - start) / len(statements) * 1000
+
+
+def _insert_reviews(user_ids, place_ids):
+    now = datetime.now()
+    rows = [{'id': str(uuid.uuid4()), 'text': 'Nice', 'rating': 4, 'place_id': place_ids[n % len(place_ids)],
+             'user_id': user_ids[n % len(user_ids)], 'created_at': now, 'updated_at': now} for n in range(5000)]
+    start = time.perf_counter()
+    db.session.execute(Review.__table__.insert(), rows)
+    db.session.commit()
+    elapsed = time.perf_counter() - start
+    db.session.execute(Review.__table__.delete().where(Review.id.in_([row['id'] for row in rows])))
+    db.session.commit()
+    return elapsed / len(rows) * 1e6
+
+
+def run(places):
+    with bench_app() as app, app.app_context():
+        user_ids, amenity_ids, place_ids = _fill(places)
+        rng = random.Random(0)
+        queries = {
+            'reviews of a user': [select(Review.id, Review.rating).where(Review.user_id == rng.choice(user_ids))
+                                  for _ in range(RUNS)],
+            'places of an owner': [select(Place.id, Place.title).where(Place.owner_id == rng.choice(user_ids))
+                                   .order_by(Place.created_at, Place.id) for _ in range(RUNS)],
+            'places of an amenity': [select(PlaceAmenity.place_id).where(PlaceAmenity.amenity_id == amenity_id)
+                                     for amenity_id in amenity_ids],
+            'facet rating sums': [select(Review.place_id, func.sum(Review.rating), func.count())
+                                  .where(Review.place_id.in_(rng.sample(place_ids, 500))).group_by(Review.place_id)
+                                  for _ in range(RUNS)],
+        }
+        results = {}
+        for label in ('without', 'with'):
+            if label == 'without':
+                for index in NEW_INDEXES:
+                    db.session.execute(text(f'DROP INDEX {index}'))
+                db.session.commit()
+            else:
+                start = time.perf_counter()
+                init_db()
+                print(f'{"migration (init_db)":<22} {(time.perf_counter() - start) * 1000:9.1f} ms')
+            for name, statements in queries.items():
+                results.setdefault(name, {})[label] = _timed(statements)
+            results.setdefault('insert a review', {})[label] = _insert_reviews(user_ids, place_ids)
+        for name, timings in results.items():
+            unit = 'us' if name == 'insert a review' else 'ms'
+            print(f'{name:<22} without {timings["without"]:9.2f} {unit}   with {timings["with"]:9.2f} {unit}')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
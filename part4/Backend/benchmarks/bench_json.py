@@ -0,0 +1,80 @@
+"""
+Encoding time of API response bodies with every available JSON backend.
+
+Usage: python -m benchmarks.bench_json [runs]   (default: 200)
+
+Builds payloads shaped like the real responses (pages of places and reviews,
+a place with its reviews embedded, a large unpaginated listing) from objects
+serialized with to_dict, then reports the average time each backend takes to
+encode them and checks that they produce the same bytes.
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.api.representations import BACKENDS
+from app.extensions import db
+from app.models.place import Place
+from app.models.review import Review
+from app.services import facade
+from config import TestingConfig
+
+WORDS = "cozy bright quiet spacious modern château garden terrace view river loft studio villa".split()
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _fill(owner):
+    rng = random.Random(0)
+    now = datetime.now()
+    places = [Place(title=_text(rng, 3)[:50], price=round(rng.uniform(10, 500), 2),
+                    latitude=rng.uniform(-90, 90), longitude=rng.uniform(-180, 180),
+                    owner=owner, description=_text(rng, 40)[:500]) for _ in range(1000)]
+    db.session.add_all(places)
+    for n in range(200):
+        review = Review(text=_text(rng, 30)[:500], rating=rng.randint(1, 5), place=places[0], user=owner)
+        review.created_at = now - timedelta(minutes=n)
+        db.session.add(review)
+    db.session.commit()
+    return places
+
+
+def _payloads(places):
+    reviews, _ = facade.get_place_reviews_page(places[0].id, 100)
+    return {
+        'places page (20)': [place.to_dict() for place in places[:20]],
+        'places page (100)': [place.to_dict() for place in places[:100]],
+        'reviews page (100)': [review.to_dict() for review in reviews],
+        'place + 200 reviews': places[0].to_dict(include=('owner', 'amenities', 'reviews')),
+        'all places (1000)': [place.to_dict() for place in places],
+    }
+
+
+def _time(dumps, payload, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        dumps(payload)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def run(runs):
+    app = create_app(TestingConfig)
+    with app.app_context():
+        owner = facade.get_user_by_email(app.config['ADMIN_EMAIL'])
+        payloads = _payloads(_fill(owner))
+        db.session.remove()
+
+    print(f"{'payload':<22}{'bytes':>10}" + "".join(f"{name + ' ms':>14}" for name in BACKENDS))
+    for name, payload in payloads.items():
+        outputs = {backend: dumps(payload) for backend, dumps in BACKENDS.items()}
+        assert len(set(outputs.values())) == 1, f"backends disagree on {name}"
+        timings = [_time(dumps, payload, runs) for dumps in BACKENDS.values()]
+        print(f"{name:<22}{len(outputs['stdlib']):>10,}" + "".join(f"{ms:>14.3f}" for ms in timings))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,79 @@
+"""
+Encode and decode throughput of MessagePack against JSON for place and review collections.
+
+Usage: python -m benchmarks.bench_msgpack [size]   (default: 10000)
+
+Fills a temporary SQLite database with places and reviews, serializes them
+with to_dict as the list endpoints do, then times encoding the collection and
+decoding it back with the stdlib json module, orjson and msgpack, whichever
+are installed.
+"""
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app.api import representations
+from app.extensions import db
+from app.models.review import Review
+from app.services import facade
+from benchmarks._common import admin_id, bench_app, fill_places, random_place, words
+
+RUNS = 10
+
+
+def _place(n, rng):
+    return {**random_place(n, rng), 'title': words(rng, 3), 'description': words(rng, 40)}
+
+
+def _fill(size, owner_id):
+    place_ids = fill_places(size, owner_id, _place)
+    rng = random.Random(size)
+    now = datetime.now()
+    db.session.execute(Review.__table__.insert(), [{
+        'id': str(uuid.uuid4()), 'created_at': now - timedelta(seconds=n), 'updated_at': now,
+        'text': words(rng, 15), 'rating': rng.randint(1, 5),
+        'place_id': rng.choice(place_ids), 'user_id': owner_id,
+    } for n in range(size)])
+    db.session.commit()
+
+
+def _codecs():
+    codecs = [('json', representations.BACKENDS['stdlib'], json.loads)]
+    if representations.orjson is not None:
+        codecs.append(('orjson', representations.orjson.dumps, representations.orjson.loads))
+    if representations.msgpack is not None:
+        codecs.append(('msgpack', representations.msgpack_dumps, representations.msgpack_loads))
+    return codecs
+
+
+def _time_ms(function, argument):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        result = function(argument)
+    return result, (time.perf_counter() - start) / RUNS * 1000
+
+
+def run(size):
+    with bench_app() as app:
+        with app.app_context():
+            _fill(size, admin_id(app))
+            collections = {
+                'places': [place.to_dict() for place in facade.iter_places()],
+                'reviews': [review.to_dict() for review in facade.iter_reviews()],
+            }
+    for name, documents in collections.items():
+        print(f'{len(documents):,} {name}')
+        for codec, dumps, loads in _codecs():
+            encoded, encode_ms = _time_ms(dumps, documents)
+            decoded, decode_ms = _time_ms(loads, encoded)
+            assert decoded == documents
+            megabytes = len(encoded) / 1e6
+            print(f'  {codec:<8} {len(encoded):>11,} B   encode {encode_ms:7.2f} ms {megabytes / encode_ms * 1000:7.1f} MB/s'
+                  f'   decode {decode_ms:7.2f} ms {megabytes / decode_ms * 1000:7.1f} MB/s')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
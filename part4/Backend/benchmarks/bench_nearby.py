@@ -0,0 +1,56 @@
+"""
+Benchmark of GET /places/nearby lookups against a full scan.
+
+Usage: python -m benchmarks.bench_nearby [size ...]   (default: 10000 100000 1000000)
+
+For every catalogue size, a temporary SQLite database is filled with places
+spread over the globe, then the average time of a 10 km radius search is
+measured through the grid cell index and through a full table scan.
+"""
+import random
+import sys
+import time
+
+from app.extensions import db
+from app.geo import cell_of, haversine_km
+from app.models.place import Place
+from app.services import facade
+from benchmarks._common import admin_id, bench_app, fill_places
+
+QUERIES = 50
+RADIUS_KM = 10
+
+
+def _place(n, rng):
+    lat, lon = rng.uniform(-60, 70), rng.uniform(-180, 180)
+    return {'title': 'Place', 'description': '', 'price': rng.uniform(10, 500),
+            'latitude': lat, 'longitude': lon, 'geo_cell': cell_of(lat, lon)}
+
+
+def _full_scan(lat, lon):
+    rows = db.session.execute(db.select(Place.id, Place.latitude, Place.longitude)).all()
+    return [row.id for row in rows if haversine_km(lat, lon, row.latitude, row.longitude) <= RADIUS_KM]
+
+
+def _time(fn, points):
+    start = time.perf_counter()
+    for lat, lon in points:
+        fn(lat, lon)
+    return (time.perf_counter() - start) / len(points) * 1000
+
+
+def run(size):
+    with bench_app() as app:
+        with app.app_context():
+            fill_places(size, admin_id(app), _place)
+            rng = random.Random(0)
+            points = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(QUERIES)]
+
+            indexed = _time(lambda lat, lon: facade.get_places_nearby(lat, lon, RADIUS_KM, 20), points)
+            scan = _time(_full_scan, points[:3])
+    print(f'{size:>10,} places   cell index {indexed:8.2f} ms   full scan {scan:10.2f} ms')
+
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]:
+        run(size)
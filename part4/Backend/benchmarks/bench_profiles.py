@@ -0,0 +1,82 @@
+"""
+Queries and latency of reading places with their relationships, lazily or
+through a loading profile.
+
+Usage: python -m benchmarks.bench_profiles [listings]   (default: 500)
+
+Fills a temporary SQLite database with `listings` places of 50 owners, each
+place with a few amenities and reviews, then reads every place with its owner,
+amenities and reviewers: once loading the relationships lazily, as they are
+touched, and once with the 'detail' loading profile.
+"""
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.amenity import Amenity, PlaceAmenity
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from app.services import facade
+from benchmarks._common import bench_app, fill_places
+
+RUNS = 10
+OWNERS = 50
+AMENITIES = 10
+
+
+def _fill(listings):
+    rng = random.Random(listings)
+    now = datetime.now()
+    stamps = {'created_at': now, 'updated_at': now}
+    users = [{'id': str(uuid.uuid4()), 'first_name': f'User {n}', 'last_name': 'Bench', 'email': f'user{n}@example.com',
+              'password': 'x', 'is_admin': False, **stamps} for n in range(OWNERS)]
+    amenities = [{'id': str(uuid.uuid4()), 'name': f'Amenity {n}', **stamps} for n in range(AMENITIES)]
+    db.session.execute(User.__table__.insert(), users)
+    db.session.execute(Amenity.__table__.insert(), amenities)
+
+    def listing(n, rng):
+        return {'title': f'Listing {n}', 'description': '', 'price': 100, 'latitude': 0, 'longitude': 0,
+                'owner_id': rng.choice(users)['id'], **stamps}
+
+    place_ids = fill_places(listings, users[0]['id'], listing)
+    db.session.execute(PlaceAmenity.__table__.insert(), [
+        {'place_id': place_id, 'amenity_id': amenity['id']}
+        for place_id in place_ids for amenity in rng.sample(amenities, rng.randint(2, 6))])
+    db.session.execute(Review.__table__.insert(), [
+        {'id': str(uuid.uuid4()), 'text': 'Nice', 'rating': 4, 'place_id': place_id,
+         'user_id': rng.choice(users)['id'], **stamps}
+        for place_id in place_ids for _ in range(rng.randint(0, 4))])
+    db.session.commit()
+
+
+def _read(query):
+    return [(place.owner.first_name, [amenity.name for amenity in place.amenities],
+             [review.user.first_name for review in place.reviews]) for place in query()]
+
+
+def run(listings):
+    with bench_app() as app, app.app_context():
+        _fill(listings)
+        statements = []
+        listener = lambda *args: statements.append(1)
+        event.listen(db.engine, "before_cursor_execute", listener)
+        for name, query in (('lazy', lambda: Place.query.all()),
+                            ("profile='detail'", lambda: facade.get_all_places(profile='detail'))):
+            statements.clear()
+            start = time.perf_counter()
+            for _ in range(RUNS):
+                db.session.expunge_all()
+                _read(query)
+            elapsed = (time.perf_counter() - start) / RUNS * 1000
+            print(f'{name:<18} {len(statements) // RUNS:6d} queries {elapsed:9.1f} ms')
+        event.remove(db.engine, "before_cursor_execute", listener)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
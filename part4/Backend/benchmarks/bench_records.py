@@ -0,0 +1,64 @@
+"""
+Latency and memory per row of listing through the ORM against Core records.
+
+Usage: python -m benchmarks.bench_records [size]   (default: 100000)
+
+Fills a temporary SQLite database with places, then loads the whole table as
+ORM instances, as the list endpoints used to, and as the Projection records of
+SQLAlchemyRepository.query, reporting the time to load and serialize the rows
+and the memory the loaded rows take.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from app.extensions import db
+from app.models.place import Place
+from app.services import facade
+from benchmarks._common import admin_id, bench_app, fill_places
+from benchmarks.bench_fields import _place
+
+RUNS = 3
+
+
+def _orm():
+    return db.session.query(Place).all()
+
+
+def _records():
+    return facade.place_repo.query().all()
+
+
+def _measure(load, size):
+    load_ms = serialize_ms = 0
+    for _ in range(RUNS):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        rows = load()
+        middle = time.perf_counter()
+        [row.to_dict() for row in rows]
+        load_ms += (middle - start) * 1000 / RUNS
+        serialize_ms += (time.perf_counter() - middle) * 1000 / RUNS
+        del rows
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    rows = load()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(rows) == size + 0
+    return load_ms, serialize_ms, memory / size
+
+
+def run(size):
+    with bench_app() as app, app.app_context():
+        fill_places(size, admin_id(app), _place)
+        print(f'{size:,} places')
+        for name, load in (('ORM instances', _orm), ('Core records', _records)):
+            load_ms, serialize_ms, per_row = _measure(load, size)
+            print(f'  {name:<14} load {load_ms:8.1f} ms   to_dict {serialize_ms:8.1f} ms   {per_row:7,.0f} B/row')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
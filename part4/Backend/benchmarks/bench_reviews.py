@@ -0,0 +1,67 @@
+"""
+Latency of the first page of GET /places/<id>/reviews/ by number of reviews.
+
+Usage: python -m benchmarks.bench_reviews [size ...]   (default: 3 1000 100000)
+
+For every size, a temporary SQLite database is filled with one place having
+that many reviews, plus the same number spread over other places, then the
+average time to fetch the first page is measured through the keyset query
+and through the former full load of place.reviews.
+"""
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models.review import Review
+from app.services import facade
+from benchmarks._common import admin_id, bench_app, fill_places
+
+RUNS = 50
+# The full load takes seconds on large places
+FULL_LOAD_RUNS = 5
+
+
+def _place(n, rng):
+    return {'title': 'Place', 'description': '', 'price': 100.0, 'latitude': 0.0, 'longitude': 0.0}
+
+
+def _fill(size, owner_id):
+    now = datetime.now()
+    rng = random.Random(size)
+    place_ids = fill_places(101, owner_id, _place)
+    for start in range(0, 2 * size, 50000):
+        db.session.execute(Review.__table__.insert(), [{
+            'id': str(uuid.uuid4()), 'created_at': now - timedelta(seconds=rng.randrange(10 ** 8)),
+            'updated_at': now, 'text': 'Lovely stay', 'rating': rng.randint(1, 5),
+            'place_id': place_ids[0] if n < size else rng.choice(place_ids[1:]), 'user_id': owner_id,
+        } for n in range(start, min(2 * size, start + 50000))])
+    db.session.commit()
+    return place_ids[0]
+
+
+def _time(fn, runs=RUNS):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+        db.session.expunge_all()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def run(size):
+    with bench_app() as app:
+        with app.app_context():
+            place_id = _fill(size, admin_id(app))
+            page = _time(lambda: facade.get_place_reviews_page(place_id, 20))
+            rated = _time(lambda: facade.get_place_reviews_page(place_id, 20, min_rating=4))
+            full = _time(lambda: [review.to_dict() for review in facade.get_place(place_id).reviews],
+                         FULL_LOAD_RUNS)
+    print(f'{size:>10,} reviews   first page {page:8.2f} ms   min_rating=4 {rated:8.2f} ms   '
+          f'place.reviews {full:10.2f} ms')
+
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [3, 1000, 100000]:
+        run(size)
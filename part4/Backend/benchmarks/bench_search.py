@@ -0,0 +1,67 @@
+"""
+Benchmark of GET /places/search against a LIKE '%...%' scan.
+
+Usage: python -m benchmarks.bench_search [size ...]   (default: 10000 100000 1000000)
+
+For every catalogue size, a temporary SQLite database is filled with places
+having a 500 character description, then the average time to fetch the first
+page of results is measured through places_fts and through a LIKE scan.
+"""
+import sys
+import time
+
+from app.extensions import db
+from app.models.place import Place
+from app.persistence.fulltext import rebuild_place_fts
+from app.services import facade
+from benchmarks._common import admin_id, bench_app, fill_places
+
+# A large vocabulary, so that a query word only appears in a small share of the places
+VOCABULARY = [f"{prefix}{suffix}" for prefix in ("ba", "ko", "mi", "su", "te", "vo", "ra", "li")
+              for suffix in range(2500)]
+WORDS = ("cozy bright quiet spacious modern rustic charming sunny central historic garden terrace "
+         "balcony view river lake mountain beach forest city village loft studio villa cabin chalet "
+         "apartment house cottage kitchen fireplace parking pool sauna wifi breakfast").split()
+QUERIES = ["fireplace sauna", "lake cabin", "historic loft", "beach villa pool", "chalet"]
+
+
+def _word(rng):
+    return rng.choice(WORDS) if rng.random() < 0.005 else rng.choice(VOCABULARY)
+
+
+def _place(n, rng):
+    description = " ".join(_word(rng) for _ in range(80))[:500]
+    return {'title': " ".join(_word(rng) for _ in range(3)), 'description': description,
+            'price': rng.uniform(10, 500), 'latitude': 0.0, 'longitude': 0.0}
+
+
+def _fill(size, owner_id):
+    fill_places(size, owner_id, _place)
+    rebuild_place_fts(db.session.connection())
+    db.session.commit()
+
+
+def _like(query):
+    filters = [Place.title.like(f'%{word}%') | Place.description.like(f'%{word}%') for word in query.split()]
+    return Place.query.filter(*filters).limit(20).all()
+
+
+def _time(fn):
+    start = time.perf_counter()
+    for query in QUERIES:
+        fn(query)
+    return (time.perf_counter() - start) / len(QUERIES) * 1000
+
+
+def run(size):
+    with bench_app() as app:
+        with app.app_context():
+            _fill(size, admin_id(app))
+            fts = _time(lambda query: facade.search_places(query, 20))
+            like = _time(_like)
+    print(f'{size:>10,} places   fts5 + bm25 {fts:8.2f} ms   LIKE scan {like:8.2f} ms')
+
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]:
+        run(size)
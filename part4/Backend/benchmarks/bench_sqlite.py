@@ -0,0 +1,92 @@
+"""
+Throughput of concurrent readers and writers on SQLite, with the default
+PRAGMAs and with those of ProductionConfig.
+
+Usage: python -m benchmarks.bench_sqlite [seconds] [readers] [writers]   (default: 10 8 2)
+
+On a temporary SQLite file holding 2,000 places, `readers` threads list pages
+of places, fetch single places and now and then stream the whole listing,
+while `writers` threads update places through the API, for `seconds` seconds.
+Reports the requests served per second, the 95th percentile latency and the
+requests that failed, e.g. on a lock timeout.
+"""
+import random
+import sys
+import threading
+import time
+
+from benchmarks._common import admin_id, bench_app, fill_places
+from config import Config, ProductionConfig
+
+PLACES = 2000
+
+
+def _place(n, rng):
+    return {'title': f'Place {n}', 'description': 'A place to stay', 'price': n % 500, 'latitude': 0, 'longitude': 0}
+
+
+def _percentile(latencies, fraction):
+    latencies = sorted(latencies)
+    return latencies[int(len(latencies) * fraction)] * 1000 if latencies else 0.0
+
+
+def _measure(app, label, place_ids, seconds, readers, writers):
+    credentials = {'email': app.config['ADMIN_EMAIL'], 'password': app.config['ADMIN_PASSWORD']}
+    token = app.test_client().post('/api/v1/auth/login', json=credentials).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    results = {'read': [], 'write': []}
+    failures = {'read': 0, 'write': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(kind, seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        latencies, failed = [], 0
+        while time.perf_counter() < deadline:
+            place_id = rng.choice(place_ids)
+            start = time.perf_counter()
+            if kind == 'write':
+                response = client.put(f'/api/v1/places/{place_id}', headers=headers,
+                                      json={'title': f'Place {rng.randrange(10 ** 6)}', 'price': rng.randrange(500)})
+            elif rng.random() < 0.1:
+                # Holds a read transaction while the whole listing is sent
+                response = client.get('/api/v1/places/?stream=true')
+                response.get_data()
+            elif rng.random() < 0.5:
+                response = client.get(f'/api/v1/places/?sort=price&min_price={rng.randrange(400)}')
+            else:
+                response = client.get(f'/api/v1/places/{place_id}')
+            if response.status_code >= 400:
+                failed += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+        with lock:
+            results[kind] += latencies
+            failures[kind] += failed
+
+    threads = [threading.Thread(target=worker, args=('read', n)) for n in range(readers)]
+    threads += [threading.Thread(target=worker, args=('write', readers + n)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for kind in ('read', 'write'):
+        print(f'{label:<17} {kind:<5} {len(results[kind]) / seconds:8.1f} req/s   '
+              f'p95 {_percentile(results[kind], 0.95):7.1f} ms   {failures[kind]} failed')
+
+
+def run(seconds, readers, writers):
+    for label, pragmas in (('SQLite defaults', Config.SQLITE_PRAGMAS),
+                           ('ProductionConfig', ProductionConfig.SQLITE_PRAGMAS)):
+        with bench_app(SQLITE_PRAGMAS=pragmas) as app:
+            with app.app_context():
+                place_ids = fill_places(PLACES, admin_id(app), _place)
+            _measure(app, label, place_ids, seconds, readers, writers)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    run(*(args + [10, 8, 2][len(args):]))
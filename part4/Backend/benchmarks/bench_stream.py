@@ -0,0 +1,66 @@
+"""
+Peak memory and time to first byte of a full export of the places.
+
+Usage: python -m benchmarks.bench_stream [size ...]   (default: 10000 100000)
+
+For every size, a temporary SQLite database is filled with places, then the
+whole table is exported as the former list endpoint did (load every row,
+build the list, encode it) and through the streamed NDJSON response. Peak
+memory is measured with tracemalloc.
+"""
+import sys
+import time
+import tracemalloc
+
+from app.extensions import db
+from app.services import facade
+from benchmarks._common import admin_id, bench_app, fill_places
+
+
+def _place(n, rng):
+    return {'title': f'Place {n}', 'description': 'A quiet place by the river ' * 8, 'price': 100.0 + n % 400,
+            'latitude': 48.85, 'longitude': 2.35}
+
+
+def _measure(export):
+    """Return (time to first byte, total time, peak MiB) of an export generator."""
+    db.session.remove()
+    tracemalloc.start()
+    start = time.perf_counter()
+    chunks = iter(export())
+    total_bytes = len(next(chunks))
+    first = time.perf_counter() - start
+    total_bytes += sum(len(chunk) for chunk in chunks)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert total_bytes
+    return first * 1000, total * 1000, peak / 2 ** 20
+
+
+def run(size):
+    with bench_app() as app:
+        dumps = app.extensions['json_dumps']
+        with app.app_context():
+            fill_places(size, admin_id(app), _place)
+        client = app.test_client()
+
+        def former():
+            with app.app_context():
+                yield dumps([place.to_dict() for place in facade.get_all_places()])
+
+        def streamed():
+            response = client.get('/api/v1/places/', headers={'Accept': 'application/x-ndjson'}, buffered=False)
+            yield from response.response
+            response.close()
+
+        with app.app_context():
+            results = [('list', _measure(former)), ('ndjson stream', _measure(streamed))]
+    for name, (first, total, peak) in results:
+        print(f'{size:>10,} places   {name:<14} first byte {first:9.1f} ms   total {total:9.1f} ms   '
+              f'peak {peak:8.1f} MiB')
+
+
+if __name__ == '__main__':
+    for size in [int(arg) for arg in sys.argv[1:]] or [10000, 100000]:
+        run(size)
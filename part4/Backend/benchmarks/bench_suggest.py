@@ -0,0 +1,60 @@
+"""
+Latency of GET /places/suggest lookups in the in-memory title index.
+
+Usage: python -m benchmarks.bench_suggest [size]   (default: 1000000)
+
+Fills a TitleIndex with synthetic titles, then reports the p50 and p99
+latency of prefix lookups of 1 to 6 characters, and of incremental updates.
+"""
+import random
+import string
+import sys
+import time
+import uuid
+
+from app.persistence.title_index import TitleIndex, normalize
+
+LOOKUPS = 20000
+UPDATES = 2000
+
+
+def _title(rng):
+    words = ("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+             for _ in range(rng.randint(1, 4)))
+    return " ".join(words).title()[:50]
+
+
+def _percentiles(samples):
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+
+def run(size):
+    rng = random.Random(size)
+    index = TitleIndex()
+    titles = {str(uuid.uuid4()): _title(rng) for _ in range(size)}
+    index._entries = sorted((normalize(title), place_id, title) for place_id, title in titles.items())
+    index._titles = titles
+
+    samples = []
+    for _ in range(LOOKUPS):
+        prefix = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(1, 6)))
+        start = time.perf_counter()
+        index.suggest(prefix, 10)
+        samples.append(time.perf_counter() - start)
+    lookup_p50, lookup_p99 = _percentiles(samples)
+
+    samples = []
+    place_ids = list(titles)
+    for _ in range(UPDATES):
+        start = time.perf_counter()
+        index.set(rng.choice(place_ids), _title(rng))
+        samples.append(time.perf_counter() - start)
+    update_p50, update_p99 = _percentiles(samples)
+
+    print(f'{size:>10,} titles   suggest p50 {lookup_p50:.3f} ms  p99 {lookup_p99:.3f} ms   '
+          f'update p50 {update_p50:.3f} ms  p99 {update_p99:.3f} ms')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,84 @@
+"""
+Write throughput on SQLite with and without the per-request unit of work.
+
+Usage: python -m benchmarks.bench_writes [count]   (default: 500)
+
+On a temporary SQLite file, posts `count` reviews and updates `count` places
+through the API, with UNIT_OF_WORK off (every repository call commits) and on
+(one commit per request), counting commits. Then creates `count` places from a
+script, committing each one or all of them in a single unit of work.
+"""
+import sys
+import time
+
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models.user import User
+from app.persistence.unit_of_work import unit_of_work
+from app.services import facade
+from benchmarks._common import admin_id, bench_app, fill_places
+
+
+def _place(n, rng):
+    return {'title': f'Place {n}', 'description': '', 'price': 100, 'latitude': 0, 'longitude': 0}
+
+
+def _timed(action, count, commits):
+    before = len(commits)
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    return count / elapsed, (len(commits) - before) / count
+
+
+def run(count):
+    for unit_of_work_on in (False, True):
+        with bench_app(UNIT_OF_WORK=unit_of_work_on) as app:
+            owner_id = admin_id(app)
+            client = app.test_client()
+            commits = []
+            with app.app_context():
+                host = User(first_name="Host", last_name="Bench", email="host@example.com", password="secret")
+                db.session.add(host)
+                db.session.commit()
+                reviewed, owned = fill_places(count, host.id, _place), fill_places(count, owner_id, _place)
+                count_commit = lambda session: commits.append(1)
+                event.listen(db.session, "after_commit", count_commit)
+            credentials = {'email': app.config['ADMIN_EMAIL'], 'password': app.config['ADMIN_PASSWORD']}
+            headers = {'Authorization': 'Bearer ' + client.post('/api/v1/auth/login', json=credentials).get_json()['access_token']}
+
+            def post_reviews():
+                for place_id in reviewed:
+                    response = client.post('/api/v1/reviews/', headers=headers,
+                                            json={'text': 'Nice', 'rating': 4, 'user_id': '', 'place_id': place_id})
+                    assert response.status_code == 201, response.get_json()
+
+            def update_places():
+                for place_id in owned:
+                    response = client.put(f'/api/v1/places/{place_id}', headers=headers,
+                                           json={'title': 'Updated', 'price': 120})
+                    assert response.status_code == 200, response.get_json()
+
+            def create_places():
+                with app.app_context():
+                    if unit_of_work_on:
+                        with unit_of_work():
+                            for n in range(count):
+                                facade.create_place({'title': f'Script {n}', 'price': 10, 'latitude': 0,
+                                                     'longitude': 0, 'owner_id': owner_id})
+                    else:
+                        for n in range(count):
+                            facade.create_place({'title': f'Script {n}', 'price': 10, 'latitude': 0,
+                                                 'longitude': 0, 'owner_id': owner_id})
+
+            label = 'unit of work' if unit_of_work_on else 'commit per call'
+            for name, action in (('POST review', post_reviews), ('PUT place', update_places),
+                                 ('script create_place', create_places)):
+                rate, per_operation = _timed(action, count, commits)
+                print(f'{label:<16} {name:<20} {rate:8.1f} ops/s   {per_operation:6.3f} commits/op')
+            event.remove(db.session, "after_commit", count_commit)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -12,12 +12,65 @@ class Config:
     
     INITIAL_AMENITIES = ['WiFi', 'Swimming Pool', 'Air Conditioning']
 
+    PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    MAX_NEARBY_RADIUS_KM = 500
+    SUGGEST_SIZE = 10
+
+    # Encoder of the JSON responses: auto (orjson if installed), orjson or stdlib
+    JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
+    # Responses smaller than COMPRESS_MIN_SIZE bytes are sent as they are, None
+    # disables compression. Levels: gzip 1-9, brotli quality 0-11. Streamed
+    # listings use the faster COMPRESS_STREAM_LEVEL.
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_LEVEL = 6
+    COMPRESS_STREAM_LEVEL = 1
+    COMPRESS_BROTLI_QUALITY = 4
+
+    # Number of entities whose JSON encoding is kept for list responses, 0 disables
+    FRAGMENT_CACHE_SIZE = 10000
+
+    # One transaction, committed once, per request
+    UNIT_OF_WORK = True
+
+    # Places validated and written together by POST /places/bulk, and the
+    # most one request can create
+    BULK_BATCH_SIZE = 500
+    BULK_MAX_ROWS = 10000
+
+    # PRAGMAs run on every new SQLite connection; empty keeps the SQLite defaults
+    SQLITE_PRAGMAS = {}
+
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///db.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+class ProductionConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///db.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Readers and the writer do not block each other in WAL mode, and commits
+    # only sync the log at checkpoints. cache_size is in KiB when negative,
+    # busy_timeout in ms: how long to wait for a lock before failing.
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64 * 1024)),
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+        'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+    }
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
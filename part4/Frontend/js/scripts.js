@@ -9,10 +9,19 @@ document.addEventListener('DOMContentLoaded', () => {
         // Check authentication and control login button visibility
         checkAuthentication();
         
+        // Fill the price filter with the ranges that have places
+        loadPriceFilter();
+
         // Add event listener for price filter
         document.getElementById('price-filter').addEventListener('change', (event) => {
             filterPlacesByPrice(event.target.value);
         });
+
+        // Append the next page of places, from the cursor of the last one
+        document.getElementById('load-more').addEventListener('click', (event) => {
+            const button = event.target;
+            fetchPlaces(getCookie('token'), button.dataset.belowPrice, button.dataset.cursor);
+        });
     }
     
     // Check if we're on the login page
@@ -319,8 +328,8 @@ async function fetchPlaceDetails(token, placeId) {
             headers['Authorization'] = `Bearer ${token}`;
         }
         
-        // Fetch place details
-        const response = await fetch(`http://localhost:3000/api/v1/places/${placeId}`, {
+        // Fetch place details with its owner, reviews and amenities in one request
+        const response = await fetch(`http://localhost:3000/api/v1/places/${placeId}?include=owner,reviews,amenities`, {
             method: 'GET',
             headers: headers
         });
@@ -328,9 +337,7 @@ async function fetchPlaceDetails(token, placeId) {
         if (response.ok) {
             const placeData = await response.json();
             displayPlaceDetails(placeData, placeId);
-            
-            // Fetch reviews for this place
-            fetchPlaceReviews(token, placeId);
+            displayPlaceReviews(placeData.reviews, placeId);
         } else {
             console.error('Failed to fetch place details:', response.statusText);
             const placeDetails = document.getElementById('place-details');
@@ -343,51 +350,6 @@ async function fetchPlaceDetails(token, placeId) {
     }
 }
 
-// Fetch reviews for a place
-async function fetchPlaceReviews(token, placeId) {
-    try {
-        const headers = {
-            'Content-Type': 'application/json'
-        };
-        
-        // Add Authorization header if token exists
-        if (token) {
-            headers['Authorization'] = `Bearer ${token}`;
-        }
-        
-        // Fetch place reviews - Ajouter un slash à la fin de l'URL pour éviter la redirection 308
-        console.log(`Fetching reviews for place ${placeId}`);
-        const response = await fetch(`http://localhost:3000/api/v1/places/${placeId}/reviews/`, {
-            method: 'GET',
-            headers: headers
-        });
-        
-        if (response.ok) {
-            const reviews = await response.json();
-            console.log(`Received ${reviews.length} reviews from API`);
-            displayPlaceReviews(reviews, placeId);
-        } else {
-            console.error('Failed to fetch reviews:', response.statusText);
-            const reviewsSection = document.querySelector('.reviews-section');
-            if (reviewsSection) {
-                const reviewsList = document.getElementById('reviews-list');
-                if (reviewsList) {
-                    reviewsList.innerHTML = '<div class="error-message">Failed to load reviews. Please try again later.</div>';
-                }
-            }
-        }
-    } catch (error) {
-        console.error('Error fetching reviews:', error);
-        const reviewsSection = document.querySelector('.reviews-section');
-        if (reviewsSection) {
-            const reviewsList = document.getElementById('reviews-list');
-            if (reviewsList) {
-                reviewsList.innerHTML = '<div class="error-message">An error occurred while loading reviews. Please try again later.</div>';
-            }
-        }
-    }
-}
-
 // Display place details
 function displayPlaceDetails(placeData, placeId) {
     const placeDetails = document.getElementById('place-details');
@@ -550,8 +512,9 @@ function checkAuthentication() {
     }
 }
 
-// Fetch places data from API
-async function fetchPlaces(token) {
+// Fetch a page of places from the API, optionally under a price:
+// the first one without a cursor, the next ones after the `cursor` of the last
+async function fetchPlaces(token, belowPrice = 'all', cursor = null) {
     try {
         const headers = {
             'Content-Type': 'application/json'
@@ -563,16 +526,29 @@ async function fetchPlaces(token) {
         }
         
         // Ajouter un slash à la fin de l'URL pour éviter la redirection 308
-        const response = await fetch('http://localhost:3000/api/v1/places/', {
+        // The cards only show the title and the price of the places
+        let url = 'http://localhost:3000/api/v1/places/?fields=id,title,price';
+        if (belowPrice !== 'all') {
+            url += `&below_price=${encodeURIComponent(belowPrice)}`;
+        }
+        if (cursor) {
+            url += `&cursor=${encodeURIComponent(cursor)}`;
+        }
+        const response = await fetch(url, {
             method: 'GET',
             headers: headers
         });
         
         if (response.ok) {
             const places = await response.json();
-            displayPlaces(places);
-            // Store places data in a global variable for filtering
-            window.placesData = places;
+            displayPlaces(places, cursor !== null);
+
+            // The API sends the cursor of the next page while there is one
+            const loadMore = document.getElementById('load-more');
+            const nextCursor = response.headers.get('X-Next-Cursor');
+            loadMore.hidden = !nextCursor;
+            loadMore.dataset.cursor = nextCursor || '';
+            loadMore.dataset.belowPrice = belowPrice;
         } else {
             console.error('Failed to fetch places:', response.statusText);
         }
@@ -581,14 +557,16 @@ async function fetchPlaces(token) {
     }
 }
 
-// Display places in the UI
-function displayPlaces(places) {
+// Display places in the UI, after the ones already listed if `append`
+function displayPlaces(places, append = false) {
     const placesList = document.getElementById('places-list');
     
     // Clear existing content
-    placesList.innerHTML = '';
+    if (!append) {
+        placesList.innerHTML = '';
+    }
     
-    if (places.length === 0) {
+    if (places.length === 0 && !append) {
         placesList.innerHTML = '<div class="no-places">No places found</div>';
         return;
     }
@@ -629,20 +607,46 @@ function displayPlaces(places) {
     console.log(`Displayed ${places.length} places with real data`);
 }
 
-// Filter places by price
-function filterPlacesByPrice(maxPrice) {
-    const places = window.placesData || [];
-    
-    if (maxPrice === 'all') {
-        // Show all places
-        displayPlaces(places);
-    } else {
-        // Filter places by price
-        const filteredPlaces = places.filter(place => place.price <= parseInt(maxPrice));
-        displayPlaces(filteredPlaces);
+// Build the price filter options from the facet counts of the API
+async function loadPriceFilter() {
+    try {
+        const response = await fetch('http://localhost:3000/api/v1/places/facets');
+        if (!response.ok) {
+            console.error('Failed to fetch facets:', response.statusText);
+            return;
+        }
+        const facets = await response.json();
+        const select = document.getElementById('price-filter');
+        select.innerHTML = '';
+
+        // Each option counts the places of its range and of every cheaper one,
+        // the ranges excluding their max as below_price does
+        let total = 0;
+        facets.price.forEach(bucket => {
+            total += bucket.count;
+            if (bucket.max !== null && bucket.count > 0) {
+                const option = document.createElement('option');
+                option.value = bucket.max;
+                option.textContent = `Under $${bucket.max} (${total})`;
+                select.appendChild(option);
+            }
+        });
+
+        const all = document.createElement('option');
+        all.value = 'all';
+        all.textContent = `All (${total})`;
+        all.selected = true;
+        select.appendChild(all);
+    } catch (error) {
+        console.error('Error fetching facets:', error);
     }
 }
 
+// Filter places by price (the filtering is done by the API)
+function filterPlacesByPrice(belowPrice) {
+    fetchPlaces(getCookie('token'), belowPrice);
+}
+
 // Login functionality
 async function loginUser(email, password) {
     try {